@@ -14,8 +14,25 @@ MTN_WEB_URL="MTN_WEB_URL"
 MTN_WEB_USERNAME="MTN_WEB_USERNAME"
 MTN_WEB_PASSWORD="MTN_WEB_PASSWORD"
 
+_TRUE_VALUES = frozenset({'true', 'yes', 'y', 'on', '1', 't'})
+
+
+# Env files already loaded, by (path, modification time).
+_loaded_env: set[tuple[str, float]] = set()
+
+
 def load_env():
-    dotenv.load_dotenv()
+    '''
+    Load the env file into the environment.  Values already in the environment take precedence.
+    Loading the same, unchanged file again is skipped.
+    '''
+    file_name = dotenv.find_dotenv()
+    if not file_name:
+        return
+    key = (file_name, os.stat(file_name).st_mtime)
+    if key not in _loaded_env:
+        dotenv.load_dotenv(file_name)
+        _loaded_env.add(key)
 
 
 def get(key: str, default:str|None=None, override: str | None=None) -> str | None:
@@ -27,20 +44,15 @@ def get(key: str, default:str|None=None, override: str | None=None) -> str | Non
 def get_int(key: str, default: int | None=None, override: int | None=None) -> int:
     if override is not None:
         return override
-    try:
-        value = os.environ[key]
-        result = int(value)
-    except KeyError:
-        result = default
-    return result
+    value = os.environ.get(key)
+    if value is None:
+        return default
+    return int(value)
 
 def get_bool(key: str, default: bool | None=None, override: bool | None=None) -> bool:
     if override is not None:
         return override
-    try:
-        value = os.environ[key]
-        result = value.lower() in ['true', 'yes', 'y', 'on', '1']
-    except KeyError:
-        result = default
-    return result
-
+    value = os.environ.get(key)
+    if value is None:
+        return default
+    return value.lower() in _TRUE_VALUES
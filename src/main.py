@@ -1,19 +1,22 @@
 import typing as t
 
 import typer
-from rich import print
+from rich import print, get_console
 from rich.table import Table
 from rich.padding import Padding
+from rich.console import Group
 from rich import box
 
 
 
 import econfig
 import mtndb
-import mtnweb
-import scrapester
 import util
 
+if t.TYPE_CHECKING:
+    import mtnweb
+    import scrapester
+
 econfig.load_env()
 
 
@@ -28,6 +31,7 @@ def whowith(
     user: t.Annotated[str, typer.Option("-u", envvar=econfig.MTN_WEB_USERNAME, help="Target person's user name")] = None,
     # password: t.Annotated[str, typer.Option("-p", help="The password to use for the scrape")] = "",
     echosql: t.Annotated[bool, typer.Option("-S", help="Echo SQL queries")] = False,
+    strictload: t.Annotated[bool, typer.Option("--strict-load", help="Raise on unexpected lazy loads (debugging)")] = False,
     profile: t.Annotated[str, typer.Option(help="Target person's profile")] = None,
 ):
     """
@@ -45,38 +49,39 @@ def whowith(
     with util.make_mtndb(is_echo=echosql) as mtn_db:
         with mtn_db.session() as mtn_session:
             try:
-                target_person = mtn_db.select_person_by(mtn_session, profile, econfig.get(econfig.MTN_WEB_USERNAME, override=user))
+                target_person = mtn_db.select_person_by(mtn_session, profile, user)
             except ValueError as e:
                 print(f"Error: {e}")
                 return
 
                 
-            print (f"{target_person.full_name}")
-            trip_list = mtndb.trips_on_date(target_person, trip_date)
+            # Collect the report and render it in one pass.
+            out: list[t.Any] = [f"{target_person.full_name}"]
+            trip_list = mtndb.trips_on_date(mtn_session, target_person.id, trip_date, strict=strictload)
             for trip in trip_list:
-                print (f"    {trip.date_start}: {trip.name} ({trip.activity_type})")
-            person_list = mtndb.people_on_trips(trip_list)
-            if target_person.profile_url in person_list:
-                del person_list[target_person.profile_url]
-            sorted_person_list = sorted(person_list.values(), key=lambda u: u.full_name)
+                out.append(f"    {trip.date_start}: {trip.name} ({trip.activity_type})")
+            person_list = [u for u in mtndb.people_on_trips(trip_list) if u.id != target_person.id]
+            sorted_person_list = sorted(person_list, key=lambda u: u.full_name)
+
+            # Fetch every co-paddler's shared activities, in date order, in one query.
+            # Without the copaddler summary, read the member lists directly.
+            shared = mtndb.shared_activities(mtn_session, target_person.id, [u.id for u in sorted_person_list],
+                                             use_copaddler=mtn_db.copaddler_is_ready(mtn_session))
 
             for co_paddler in sorted_person_list:
-                print (f"  {co_paddler.full_name}")
-                co_table = Table("start", "Activity", "Type", box=TABLE_BOX_STYE)
-                is_on_trip = False
-                sorted_activity_list = sorted(target_person.activity_list, key=lambda am: am.activity.date_start)
-                for target_am in sorted_activity_list:
-                    an_activity = target_am.activity
-                    for a_member in an_activity.member_list:
-                        if a_member.person == co_paddler:
-                            co_table.add_row(str(an_activity.date_start), an_activity.name, an_activity.activity_type)
-                            #print(f"    {an_activity.date_start}: {an_activity.name:<60} ({an_activity.activity_type})")
-                            is_on_trip = True
-                if co_table.row_count > 0:
-                    print(Padding.indent(co_table, 4))
-                if not is_on_trip:
-                    print ("  Not on trip")
-                print ("")
+                out.append(f"  {co_paddler.full_name}")
+                co_activity_list = shared.get(co_paddler.id, ())
+                if co_activity_list:
+                    co_table = Table("start", "Activity", "Type", box=TABLE_BOX_STYE)
+                    add_row = co_table.add_row
+                    for _, date_start, name, activity_type in co_activity_list:
+                        add_row(str(date_start), name, activity_type)
+                        #print(f"    {date_start}: {name:<60} ({activity_type})")
+                    out.append(Padding.indent(co_table, 4))
+                else:
+                    out.append("  Not on trip")
+                out.append("")
+            print(Group(*out))
 
 
 
@@ -86,10 +91,10 @@ def whowith(
 def diddo(
     trip_phrase: t.Annotated[str, typer.Argument(help="The phrase to search for")],
     echosql: t.Annotated[bool, typer.Option("-S", help="Echo SQL queries")] = False,
+    strictload: t.Annotated[bool, typer.Option("--strict-load", help="Raise on unexpected lazy loads (debugging)")] = False,
     user: t.Annotated[str, typer.Option("-u", envvar=econfig.MTN_WEB_USERNAME, help="Login user name")] = None,
     profile: t.Annotated[str, typer.Option(help="Target person's profile")] = None,
 ):
-    trip_phrase_lower = trip_phrase.lower()
     with util.make_mtndb(is_echo=echosql) as mtn_db:
         with mtn_db.session() as mtn_session:
             try:
@@ -99,22 +104,23 @@ def diddo(
                 return
             
             print (f"{target_person.full_name} did do '{trip_phrase}':")
-            for am in target_person.activity_list:
-                a = am.activity
-                if trip_phrase_lower in a.name.lower():
-                    print(f"  {a.date_start}: {a.name} ({a.activity_type})")
+            for a in mtndb.activities_matching_phrase(mtn_session, target_person.id, trip_phrase,
+                                                          strict=strictload):
+                print(f"  {a.date_start}: {a.name} ({a.activity_type})")
 
 
 @app.command()
 def tripstatus(
     trip_date_str: t.Annotated[str, typer.Argument(help="The trip date")],
     echosql: t.Annotated[bool, typer.Option("-S", help="Echo SQL queries")] = False,
+    strictload: t.Annotated[bool, typer.Option("--strict-load", help="Raise on unexpected lazy loads (debugging)")] = False,
     update: t.Annotated[bool, typer.Option(help="Update the trip")] = False,
     user: t.Annotated[str, typer.Option("-u", envvar=econfig.MTN_WEB_USERNAME, help="Login user name")] = None,
     password: t.Annotated[str, typer.Option("-p", envvar=econfig.MTN_WEB_PASSWORD, help="Login password")] = None,
     profile: t.Annotated[str, typer.Option(help="Target person's profile")] = None,
 ):
     trip_date = util.parse_date(trip_date_str)
+    is_terminal = get_console().is_terminal
 
 
 
@@ -123,6 +129,7 @@ def tripstatus(
             scraper: scrapester.Scrapester  | None = None
             mtn_web: mtnweb.ScrapeMtnWeb | None = None
             if update:
+                import scrapester
                 mtn_web = util.make_mtnweb()
                 scraper = scrapester.Scrapester(mtn_web, mtn_db,
                                 user, 
@@ -138,28 +145,38 @@ def tripstatus(
 
                     
                 print (f"{target_person.full_name}")
-                trip_list = mtndb.trips_on_date(target_person, trip_date)
+                trip_list = mtndb.trips_on_date(mtn_session, target_person.id, trip_date,
+                                                load_options=(mtndb.LOAD_MEMBER_NAMES,), strict=strictload)
 
 
                 for an_activity in trip_list:
                     if update:
                         print (f"Updating {an_activity.name}")
                         scraper.activity_update(an_activity)
-                    print (f"  {an_activity.date_start}-{an_activity.date_end} : {an_activity.name:<60} ({an_activity.activity_type})")
-                    print (f"    {an_activity.activity_url}")
-                    print (f"    {an_activity.branch} - {an_activity.committee}")
-                    print (f"    {an_activity.difficulty}, leader: {an_activity.leader_rating}, milage: {an_activity.milage}")
-                    print (f"    {an_activity.route_name}   ({an_activity.route_link})")
-                    print (f"    {an_activity.status} - {an_activity.result}")
-                    print (f"    last scrape: {an_activity.scrapped_at}, next scrape: {an_activity.next_scrape}")
-
-                    member_table = Table("count", "name", "role", box=TABLE_BOX_STYE)
-                    for i, a_member in enumerate(an_activity.member_list):
-                        u = a_member.person
-                        member_table.add_row(str(i+1), u.full_name, a_member.role)
-                    print (Padding.indent(member_table, 4))
-
-                    print ("")
+                    # Render each activity's report in one pass.
+                    out: list[t.Any] = [
+                        f"  {an_activity.date_start}-{an_activity.date_end} : {an_activity.name:<60} ({an_activity.activity_type})",
+                        f"    {an_activity.activity_url}",
+                        f"    {an_activity.branch} - {an_activity.committee}",
+                        f"    {an_activity.difficulty}, leader: {an_activity.leader_rating}, milage: {an_activity.milage}",
+                        f"    {an_activity.route_name}   ({an_activity.route_link})",
+                        f"    {an_activity.status} - {an_activity.result}",
+                        f"    last scrape: {an_activity.scrapped_at}, next scrape: {an_activity.next_scrape}",
+                    ]
+
+                    if is_terminal:
+                        member_table = Table("count", "name", "role", box=TABLE_BOX_STYE)
+                        for i, a_member in enumerate(an_activity.member_list):
+                            u = a_member.person
+                            member_table.add_row(str(i+1), u.full_name, a_member.role)
+                        out.append(Padding.indent(member_table, 4))
+                    else:
+                        # Output is piped, skip the table layout.
+                        for i, a_member in enumerate(an_activity.member_list):
+                            out.append(f"    {i+1:>5}  {a_member.person.full_name:<40} {a_member.role}")
+
+                    out.append("")
+                    print (Group(*out))
             finally:
                 if scraper:
                     scraper.close()
@@ -169,6 +186,23 @@ def tripstatus(
 
 
 
+@app.command()
+def copaddlers(
+    echosql: t.Annotated[bool, typer.Option("-S", help="Echo SQL queries")] = False,
+):
+    """
+    Rebuild the co-paddler summary used by whowith from the activity member lists.
+    """
+    with util.make_mtndb(is_echo=echosql) as mtn_db:
+        mtn_db.create_tables()
+        with mtn_db.session() as mtn_session:
+            mtn_db.copaddler_rebuild(mtn_session)
+            mtn_session.commit()
+    print ("Done rebuilding co-paddlers")
+
+
+
+
 @app.command()
 def scrape(
     echosql: t.Annotated[bool, typer.Option("-S", help="Echo SQL queries")] = False,
@@ -177,13 +211,27 @@ def scrape(
     user: t.Annotated[str, typer.Option("-u", envvar=econfig.MTN_WEB_USERNAME, help="Login user name")] = None,
     password: t.Annotated[str, typer.Option("-p", envvar=econfig.MTN_WEB_PASSWORD, help="Login password")] = None,
     profile: t.Annotated[str, typer.Option(help="Target person's profile")] = None,
+    workers: t.Annotated[int, typer.Option("-w", help="Browsers to fetch activity pages with in parallel")] = 1,
 ):
+    import scrapester
     print ("scrape")
+
+    def make_worker_mtnweb() -> "mtnweb.ScrapeMtnWeb":
+        worker_web = util.make_mtnweb(is_visible=browser)
+        try:
+            worker_web.login(user, password)
+        except Exception:
+            worker_web.close()
+            raise
+        return worker_web
+
     with util.make_mtnweb(is_visible=browser) as mtn_web:
         with util.make_mtndb(is_echo=echosql) as mtn_db:
             scraper = scrapester.Scrapester(mtn_web, mtn_db, 
                                     user, 
-                                    password)
+                                    password,
+                                    make_mtn_web=make_worker_mtnweb,
+                                    scrape_workers=workers)
             scraper.is_scrape_future = fsf
 
             scraper.login()
@@ -1,39 +1,138 @@
 import typing as t
+import collections
 import datetime
 
 import mtnschema
 
-from sqlalchemy import Engine, select
+from sqlalchemy import Engine, delete, insert, inspect, select
+from sqlalchemy.exc import MultipleResultsFound, NoResultFound
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
+from sqlalchemy.orm import aliased, raiseload, selectinload
 
 
 
 
 
-def trips_on_date(person: mtnschema.Person, trip_date: datetime.date) -> list[mtnschema.Activity]:
-    trip_list = []
-    for am in person.activity_list:
-        a = am.activity
-        if trip_date >= a.date_start and trip_date <= a.date_end:
-            trip_list.append(a)
-    return trip_list
+def _insert_for(session: Session):
+    '''The insert construct for the session's database, for its ON CONFLICT support.'''
+    if session.get_bind().dialect.name == "sqlite":
+        return sqlite_insert
+    return postgresql_insert
 
 
-def people_on_trips(trip_list: list[mtnschema.Activity]) -> dict[str, mtnschema.Person]:
-    person_list: dict[str, mtnschema.Person] = {}
-    for a in trip_list: 
+# Loader option for reports that only show each member's name.
+LOAD_MEMBER_NAMES = selectinload(mtnschema.Activity.member_list) \
+                        .selectinload(mtnschema.ActivityMember.person) \
+                        .load_only(mtnschema.Person.id, mtnschema.Person.full_name)
+
+
+def trips_on_date(session: Session, person_id: int, trip_date: datetime.date,
+                  load_options: t.Sequence[t.Any] | None = None, strict: bool = False) -> list[mtnschema.Activity]:
+    """
+    A person's activities that are happening on trip_date.
+
+    load_options replaces the default eager loading of each activity's members.
+    strict raises on any lazy load not covered by the eager loading.  For debugging.
+    """
+    if load_options is None:
+        load_options = (selectinload(mtnschema.Activity.member_list).joinedload(mtnschema.ActivityMember.person),)
+    if strict:
+        load_options = (*load_options, raiseload("*"))
+    stmt = select(mtnschema.Activity) \
+            .join(mtnschema.ActivityMember) \
+            .where(mtnschema.ActivityMember.person_id == person_id,
+                   mtnschema.Activity.date_start <= trip_date,
+                   mtnschema.Activity.date_end >= trip_date) \
+            .order_by(mtnschema.Activity.date_start) \
+            .options(*load_options)
+    return list(session.scalars(stmt).all())
+
+
+def _like_escape(text: str) -> str:
+    """Escape LIKE wildcards using '/' as the escape character."""
+    return text.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+def activities_matching_phrase(session: Session, person_id: int, phrase: str,
+                               strict: bool = False) -> list[mtnschema.Activity]:
+    """
+    A person's activities whose name contains phrase, ignoring case.
+
+    strict raises on any lazy load from the activities.  For debugging.
+    """
+    stmt = select(mtnschema.Activity) \
+            .join(mtnschema.ActivityMember) \
+            .filter(mtnschema.ActivityMember.person_id == person_id,
+                    mtnschema.Activity.name.ilike(f"%{_like_escape(phrase)}%", escape="/")) \
+            .order_by(mtnschema.Activity.date_start)
+    if strict:
+        stmt = stmt.options(raiseload("*"))
+    return list(session.execute(stmt).scalars().unique())
+
+
+def people_on_trips(trip_list: list[mtnschema.Activity]) -> list[mtnschema.Person]:
+    """The distinct people on any of the trips, in order of first appearance."""
+    seen_ids: set[int] = set()
+    people: list[mtnschema.Person] = []
+    for a in trip_list:
         for am in a.member_list:
             u = am.person
-            if u.profile_url not in person_list:
-                person_list[u.profile_url] = u
-    return person_list
+            if u.id not in seen_ids:
+                seen_ids.add(u.id)
+                people.append(u)
+    return people
+
+
+def shared_activities(session: Session, person_id: int, other_person_ids: t.Iterable[int],
+                      use_copaddler: bool = True) -> dict[int, list[t.Any]]:
+    """
+    Find the activities that a person shared with each of some other people.
+
+    use_copaddler reads the copaddler summary.  Otherwise activitymember is joined to itself, which gives the
+    same answer more slowly; use it when the summary is not ready (MtnDB.copaddler_is_ready).
+
+    Returns:
+        A dict from other person id to rows of (person_id, date_start, name, activity_type), in date order.
+    """
+    if use_copaddler:
+        cp = mtnschema.CoPaddler
+        person_a_id, person_b_id, activity_id = cp.person_a_id, cp.person_b_id, cp.activity_id
+        pairs = select().select_from(cp)
+    else:
+        am_a = aliased(mtnschema.ActivityMember)
+        am_b = aliased(mtnschema.ActivityMember)
+        person_a_id, person_b_id, activity_id = am_a.person_id, am_b.person_id, am_a.activity_id
+        pairs = select().select_from(am_a).join(am_b, (am_a.activity_id == am_b.activity_id) & (am_a.person_id != am_b.person_id))
+    stmt = pairs.add_columns(person_b_id.label("person_id"),
+                             mtnschema.Activity.date_start,
+                             mtnschema.Activity.name,
+                             mtnschema.Activity.activity_type) \
+            .join(mtnschema.Activity, activity_id == mtnschema.Activity.id) \
+            .where(person_a_id == person_id,
+                   person_b_id.in_(list(other_person_ids))) \
+            .order_by(mtnschema.Activity.date_start)
+    shared: dict[int, list[t.Any]] = collections.defaultdict(list)
+    for row in session.execute(stmt):
+        shared[row.person_id].append(row)
+    return shared
+
 
 class MtnDB():
 
     def __init__(self, engine: Engine):
         self.engine = engine
         self.metadata = mtnschema.Base.metadata
-        pass
+        # Lookup caches so repeated finds by URL skip the SELECT.  Entries are only
+        # trusted while still attached to the session asking for them.
+        self._person_url_cache: dict[str, mtnschema.Person] = {}
+        self._activity_url_cache: dict[str, mtnschema.Activity] = {}
+        # Whether person.profile_url has a unique index, checked when first needed.  A database
+        # created before it was added has only a plain index; see doc/database_import.md.
+        self._is_profile_url_unique: bool | None = None
+        # Set once the copaddler table is known to exist.
+        self._has_copaddler_table = False
 
     def __enter__(self):
         return self
@@ -43,6 +142,8 @@ class MtnDB():
         return False
     
     def close(self):
+        self._person_url_cache.clear()
+        self._activity_url_cache.clear()
         self.engine.dispose()
 
     def create_tables(self):
@@ -51,6 +152,29 @@ class MtnDB():
     def drop_tables(self):
         mtnschema.Base.metadata.drop_all(self.engine)
 
+    def is_profile_url_unique(self, session: Session) -> bool:
+        '''Does the database have the unique index on person.profile_url?'''
+        if self._is_profile_url_unique is None:
+            # Inspect on the session's connection, inside its transaction, not a second pooled one.
+            db_inspector = inspect(session.connection())
+            self._is_profile_url_unique = \
+                any(ix["unique"] and ix["column_names"] == ["profile_url"] for ix in db_inspector.get_indexes("person")) \
+                or any(uc["column_names"] == ["profile_url"] for uc in db_inspector.get_unique_constraints("person"))
+        return self._is_profile_url_unique
+
+    def copaddler_is_ready(self, session: Session) -> bool:
+        '''
+        Is the copaddler summary there and filled in?  A database from before the summary may lack the table,
+        or have it empty after create_all, until copaddler_rebuild is run (the copaddlers command).
+        '''
+        if not self._has_copaddler_table:
+            if not inspect(session.connection()).has_table(mtnschema.CoPaddler.__tablename__):
+                return False
+            self._has_copaddler_table = True
+        # Empty is only right when no activity has two members; an empty activitymember is close enough.
+        return session.scalar(select(mtnschema.CoPaddler.activity_id).limit(1)) is not None \
+                or session.scalar(select(mtnschema.ActivityMember.id).limit(1)) is None
+
     def session(self) -> Session:
         s = Session(self.engine)
         # s.autoflush = False
@@ -58,18 +182,77 @@ class MtnDB():
 
 
 
+    @staticmethod
+    def _cache_get(cache: dict, session: Session, key: str, url_attr: str):
+        obj = cache.get(key)
+        if obj is None:
+            return None
+        state = inspect(obj)
+        # Drop entries from another (or no) session, deleted rows, and rows whose URL has changed.
+        # An expired URL is absent from state.dict and is assumed unchanged.
+        if state.session is not session or state.deleted or state.dict.get(url_attr, key) != key:
+            del cache[key]
+            return None
+        return obj
+
+
     def person_find_by_url(self, session: Session, profile_url: str) -> mtnschema.Person | None:
-        stmt = session.query(mtnschema.Person).filter(mtnschema.Person.profile_url == profile_url)
-        result = session.execute(stmt)
-        r = result.scalars().first()
-        return r
+        person = self._cache_get(self._person_url_cache, session, profile_url, "profile_url")
+        if person is None:
+            stmt = select(mtnschema.Person).where(mtnschema.Person.profile_url == profile_url)
+            person = session.scalars(stmt).first()
+            if person is not None:
+                self._person_url_cache[profile_url] = person
+        return person
+
+
+    def persons_find_by_urls(self, session: Session, profile_urls: t.Iterable[str]) -> dict[str, mtnschema.Person]:
+        '''Find the people with any of the profile URLs.  Those not already cached are found in one query.'''
+        found: dict[str, mtnschema.Person] = {}
+        missing: list[str] = []
+        for profile_url in dict.fromkeys(profile_urls):
+            person = self._cache_get(self._person_url_cache, session, profile_url, "profile_url")
+            if person is None:
+                missing.append(profile_url)
+            else:
+                found[profile_url] = person
+        if missing:
+            stmt = select(mtnschema.Person).where(mtnschema.Person.profile_url.in_(missing))
+            for person in session.scalars(stmt):
+                if person.profile_url not in found:
+                    found[person.profile_url] = person
+                    self._person_url_cache[person.profile_url] = person
+        return found
+
+
+    def persons_insert(self, session: Session, rows: list[dict[str, t.Any]]) -> dict[str, mtnschema.Person]:
+        '''
+        Insert people from column values in one statement.  Returns the people by profile URL.
+
+        When the database has the unique profile URL index, a profile URL that is already there is left as
+        it is and its person returned.  Without the index the rows are inserted as they are.
+        '''
+        if not rows:
+            return {}
+        if self.is_profile_url_unique(session):
+            stmt = _insert_for(session)(mtnschema.Person) \
+                    .on_conflict_do_nothing(index_elements=[mtnschema.Person.profile_url]) \
+                    .returning(mtnschema.Person)
+        else:
+            stmt = insert(mtnschema.Person).returning(mtnschema.Person)
+        people = {person.profile_url: person for person in session.scalars(stmt, rows)}
+        # Anyone skipped was added since they were looked up, by another scrape.
+        skipped = [row["profile_url"] for row in rows if row["profile_url"] not in people]
+        if skipped:
+            people.update(self.persons_find_by_urls(session, skipped))
+        for person in people.values():
+            self._person_url_cache[person.profile_url] = person
+        return people
 
 
     def person_find_by_username(self, session: Session, username: str) -> mtnschema.Person | None:
-        stmt = session.query(mtnschema.Person).filter(mtnschema.Person.user_name == username)  
-        result = session.execute(stmt)
-        r = result.scalars().first()
-        return r
+        stmt = select(mtnschema.Person).where(mtnschema.Person.user_name == username)
+        return session.scalars(stmt).first()
 
 
 
@@ -96,27 +279,108 @@ class MtnDB():
             stmt = stmt.filter(mtnschema.Person.user_name == user_name)
         else:
             raise ValueError("Must provide either profile_url or user_name")
-        result = session.execute(stmt).scalars().all()
-        if len(result) != 1:
-            raise ValueError(f"Expected 1 result, got {len(result)}")
-        return result[0]
+        try:
+            return session.execute(stmt).scalar_one()
+        except NoResultFound:
+            raise ValueError("Expected 1 result, got 0")
+        except MultipleResultsFound:
+            raise ValueError("Expected 1 result, got more than 1")
 
 
     def activity_find_by_url(self,  session: Session, activity_url: str) -> mtnschema.Activity | None:
-        stmt = session.query(mtnschema.Activity).filter(mtnschema.Activity.activity_url == activity_url)
-        result = session.execute(stmt)
-        return result.scalars().first()
+        activity = self._cache_get(self._activity_url_cache, session, activity_url, "activity_url")
+        if activity is None:
+            stmt = select(mtnschema.Activity).where(mtnschema.Activity.activity_url == activity_url)
+            activity = session.scalars(stmt).first()
+            if activity is not None:
+                self._activity_url_cache[activity_url] = activity
+        return activity
     
-    def activitymember_find(self,  session: Session, person_id: int, activity_id: int) -> mtnschema.ActivityMember | None:
-        stmt = session.query(mtnschema.ActivityMember).filter(mtnschema.ActivityMember.person_id == person_id).filter(mtnschema.ActivityMember.activity_id == activity_id)
-        result = session.execute(stmt)
-        return result.scalars().first()
-        
+    def activities_find_by_urls(self, session: Session, activity_urls: t.Iterable[str]) -> dict[str, mtnschema.Activity]:
+        '''Find the activities with any of the URLs.  Those not already cached are found in one query.'''
+        found: dict[str, mtnschema.Activity] = {}
+        missing: list[str] = []
+        for activity_url in dict.fromkeys(activity_urls):
+            activity = self._cache_get(self._activity_url_cache, session, activity_url, "activity_url")
+            if activity is None:
+                missing.append(activity_url)
+            else:
+                found[activity_url] = activity
+        if missing:
+            stmt = select(mtnschema.Activity).where(mtnschema.Activity.activity_url.in_(missing))
+            for activity in session.scalars(stmt):
+                if activity.activity_url not in found:
+                    found[activity.activity_url] = activity
+                    self._activity_url_cache[activity.activity_url] = activity
+        return found
+
+    def activity_members_load(self, session: Session, activity: mtnschema.Activity):
+        '''Load an activity's members and their people together, unless the member list is already loaded.'''
+        if activity.id is None or "member_list" in inspect(activity).dict:
+            return
+        stmt = select(mtnschema.Activity) \
+                .where(mtnschema.Activity.id == activity.id) \
+                .options(selectinload(mtnschema.Activity.member_list).joinedload(mtnschema.ActivityMember.person))
+        session.scalars(stmt).all()
+
+    def activitymembers_by_activity_url(self, session: Session, person_id: int) -> dict[str, mtnschema.ActivityMember]:
+        '''A person's activity memberships by activity URL, in one query.'''
+        stmt = select(mtnschema.ActivityMember, mtnschema.Activity.activity_url) \
+                .join(mtnschema.Activity, mtnschema.ActivityMember.activity_id == mtnschema.Activity.id) \
+                .where(mtnschema.ActivityMember.person_id == person_id) \
+                .order_by(mtnschema.ActivityMember.id)
+        am_by_url: dict[str, mtnschema.ActivityMember] = {}
+        for am, activity_url in session.execute(stmt):
+            am_by_url.setdefault(activity_url, am)
+        return am_by_url
+
+    def copaddler_rebuild(self, session: Session, activity_ids: t.Iterable[int] | None = None):
+        """
+        Rebuild the copaddler summary from activitymember for some activities, or for all when activity_ids is None.
+        Pending changes are flushed first so the summary sees them.
+        """
+        session.flush()
+        cp = mtnschema.CoPaddler
+        am_a = aliased(mtnschema.ActivityMember)
+        am_b = aliased(mtnschema.ActivityMember)
+        pairs = select(am_a.person_id, am_b.person_id, am_a.activity_id) \
+                    .join(am_b, (am_a.activity_id == am_b.activity_id) & (am_a.person_id != am_b.person_id)) \
+                    .distinct()
+        remove = delete(cp)
+        if activity_ids is not None:
+            activity_ids = list(activity_ids)
+            pairs = pairs.where(am_a.activity_id.in_(activity_ids))
+            remove = remove.where(cp.activity_id.in_(activity_ids))
+        session.execute(remove)
+        session.execute(insert(cp).from_select(["person_a_id", "person_b_id", "activity_id"], pairs))
+
+    def copaddler_refresh(self, session: Session, activity_ids: t.Iterable[int]):
+        '''
+        Bring the copaddler summary up to date after changes to some activities' members.  If the summary is
+        empty it is rebuilt in full, so it is not left holding only the recently changed activities.  Without
+        the table there is nothing to do; whowith reads activitymember instead.
+        '''
+        session.flush()
+        if self.copaddler_is_ready(session):
+            self.copaddler_rebuild(session, activity_ids)
+        elif self._has_copaddler_table:
+            self.copaddler_rebuild(session)
+
+    def activitymembers_insert(self, session: Session, rows: list[dict[str, t.Any]]):
+        '''
+        Insert activity members from column values, in one executemany rather than one ORM insert per row.
+        Collections already loaded in the session do not see the new rows until they are expired.
+        '''
+        if rows:
+            session.execute(insert(mtnschema.ActivityMember), rows)
+
     def person_add(self,  session: Session, person: mtnschema.Person):
+        # Not flushed here; the next query (autoflush) or commit writes it.
         session.add(person)
-        session.flush()
+        self._person_url_cache[person.profile_url] = person
 
     def activity_add(self,  session: Session, activity: mtnschema.Activity):
+        # Not flushed here; the next query (autoflush) or commit writes it.
         session.add(activity)
-        session.flush()
+        self._activity_url_cache[activity.activity_url] = activity
         
\ No newline at end of file
@@ -1,7 +1,7 @@
 import typing as t
 import datetime
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy import String, DateTime, Date
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped
@@ -40,12 +40,13 @@ class Person(Base):
     '''A person who joins activities.'''
     __tablename__ = "person"
     id: Mapped[int] = mapped_column(primary_key=True)
-    profile_url: Mapped[str] = mapped_column(String(URL_LENGTH), default="", index=True)
+    profile_url: Mapped[str] = mapped_column(String(URL_LENGTH), default="", index=True, unique=True)
     user_name: Mapped[str] = mapped_column(String(USER_NAME_LENGTH), default="", index=True)
-    password: Mapped[str] = mapped_column(String(PASSWORD_LENGTH), default="")
+    # password, portrait_url and email are never shown by the reports, so load them only on access.
+    password: Mapped[str] = mapped_column(String(PASSWORD_LENGTH), default="", deferred=True)
     full_name: Mapped[str] = mapped_column(String(PERSON_NAME_LENGTH), default="", index=True)
-    portrait_url: Mapped[str] = mapped_column(String(URL_LENGTH), default="")
-    email: Mapped[str] = mapped_column(String(EMAIL_LENGTH), default="")
+    portrait_url: Mapped[str] = mapped_column(String(URL_LENGTH), default="", deferred=True)
+    email: Mapped[str] = mapped_column(String(EMAIL_LENGTH), default="", deferred=True)
     branch: Mapped[str] = mapped_column(String(BRANCH_LENGTH), default="")
 
     is_scrapped: Mapped[bool] = mapped_column(default=False)  
@@ -63,10 +64,12 @@ class Person(Base):
 class ActivityMember(Base):
     '''A record of a person's participation in an activity.'''
     __tablename__ = "activitymember"
+    __table_args__ = (Index("ix_am_person_activity", "person_id", "activity_id", unique=True),)
     id: Mapped[int] = mapped_column(primary_key=True)
     
     person_id: Mapped[int] = mapped_column(ForeignKey("person.id", ondelete="CASCADE"))
-    activity_id: Mapped[int] = mapped_column(ForeignKey("activity.id", ondelete="CASCADE"))
+    # Indexed for the copaddler self-join on activity; ix_am_person_activity leads with person_id.
+    activity_id: Mapped[int] = mapped_column(ForeignKey("activity.id", ondelete="CASCADE"), index=True)
     person: Mapped["Person"] = relationship("Person", back_populates="activity_list")                     # Who is on the activity
     activity: Mapped["Activity"] = relationship("Activity", back_populates="member_list")                   # what activity
     role: Mapped[str] = mapped_column(String(ROLE_LENGTH), default="")          # Person's role on the activity
@@ -82,13 +85,14 @@ class ActivityMember(Base):
 class Activity(Base):
     '''An activity.'''
     __tablename__ = "activity"
+    __table_args__ = (Index("ix_activity_date_start_date_end", "date_start", "date_end"),)
     id: Mapped[int] = mapped_column(primary_key=True)
 
     #
     # Trip information
     #
     date_start: Mapped[datetime.date] = mapped_column(Date)
-    date_end: Mapped[datetime.date] = mapped_column(Date)
+    date_end: Mapped[datetime.date] = mapped_column(Date, index=True)
     name: Mapped[str] = mapped_column(String(URL_LENGTH), default="")
     activity_url: Mapped[str] = mapped_column(String(URL_LENGTH), default="", index=True)
     committee: Mapped[str] = mapped_column(String(COMMITTEE_LENGTH), default="")
@@ -116,4 +120,16 @@ class Activity(Base):
     next_scrape: Mapped[datetime.datetime | None] = mapped_column(DateTime)
     scrape_error: Mapped[str] = mapped_column(String(200), default="")
     scrape_error_count: Mapped[int] = mapped_column(default=0)
-    scrape_error_time: Mapped[datetime.datetime | None] = mapped_column(DateTime)
\ No newline at end of file
+    scrape_error_time: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+
+
+class CoPaddler(Base):
+    '''A summary of who was on an activity with whom, one row per ordered pair of members.
+    Derived from activitymember; rebuilt by MtnDB.copaddler_rebuild.'''
+    __tablename__ = "copaddler"
+    person_a_id: Mapped[int] = mapped_column(ForeignKey("person.id", ondelete="CASCADE"), primary_key=True)
+    person_b_id: Mapped[int] = mapped_column(ForeignKey("person.id", ondelete="CASCADE"), primary_key=True, index=True)
+    activity_id: Mapped[int] = mapped_column(ForeignKey("activity.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+    def __repr__(self) -> str:
+        return f"CoPaddler(person_a_id={self.person_a_id!r}, person_b_id={self.person_b_id!r}, activity_id={self.activity_id!r})"
@@ -1,14 +1,19 @@
 import typing as t
 import datetime
 import dataclasses
+import functools
 import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import ElementNotInteractableException, WebDriverException
+from selenium.common.exceptions import ElementNotInteractableException, TimeoutException, WebDriverException
 from selenium.webdriver.support.wait import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.remote.webelement import WebElement
-import time
 from selenium.webdriver.common.action_chains import ActionChains
 
 import econfig
@@ -40,6 +45,12 @@ ERROR_STRING_DNS = "e=dnsNotFound"
 DELAY_DNS_ERROR = 1 * 60
 DELAY_TIMEOUT = 30
 
+# How long to wait for the element a page is expected to show.
+WAIT_PAGE_LOAD = 30
+
+# How long to wait for a listing to re-render after changing a filter.
+WAIT_RERENDER = 5
+
 
 
 
@@ -68,7 +79,7 @@ class MissingContentException(ScrapeException):
         
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class ScrapedUser():
     user_name: str = ""
     password: str = ""
@@ -79,7 +90,7 @@ class ScrapedUser():
     branch: str = ""
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class ScrapedActivityMember():
     activity_url: str = ""
     activity_name: str = ""
@@ -93,7 +104,7 @@ class ScrapedActivityMember():
     activity_result: str = ""
 
    
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class ScrapedActivity():
     date_start: datetime.date | None = None
     date_end: datetime.date | None = None
@@ -112,19 +123,133 @@ class ScrapedActivity():
     participants: list[ScrapedActivityMember] = dataclasses.field(default_factory=list)
 
 
+# Snapshot of the member activities table: one object per row, null for a missing cell.
+_MEMBER_ACTIVITIES_JS = """
+const cellText = (tr, th) => {
+    const td = tr.querySelector(`td[data-th='${th}']`);
+    return td ? td.innerText.trim() : null;
+};
+return Array.from(document.querySelectorAll("tr.activity-listing")).map(tr => {
+    const ae = tr.querySelector("td[data-th='Activity/Event']");
+    const link = ae ? ae.querySelector("a") : null;
+    const rr = tr.querySelector("td[data-th='Role: Result']");
+    return {
+        has_ae: ae !== null,
+        url: link ? link.href : null,
+        name: link ? link.innerText.trim() : null,
+        status: cellText(tr, "Status"),
+        role: cellText(tr, "Role"),
+        rr_spans: rr ? Array.from(rr.querySelectorAll("span")).map(span => span.innerText.trim()) : null,
+        registration: cellText(tr, "Registration Status"),
+        trip_result: cellText(tr, "Trip Result"),
+    };
+});
+"""
+
+
+# Snapshot of a profile page.  null marks a missing element; branch is "" when there is no Branch detail.
+_PROFILE_JS = """
+const text = el => el ? el.innerText.trim() : null;
+const wrapper = document.querySelector("div.profile-wrapper");
+const data = {url: location.href, has_wrapper: wrapper !== null,
+              portrait_url: null, full_name: null, branch: null, email: null};
+if (!wrapper) {
+    return data;
+}
+const img = document.querySelector("div.portrait > img");
+data.portrait_url = img ? img.src : null;
+data.full_name = text(wrapper.querySelector("h1"));
+const details = document.querySelector("ul.details.no-bullets");
+if (details) {
+    data.branch = "";
+    for (const li of details.querySelectorAll("li")) {
+        if (li.innerText.includes("Branch")) {
+            data.branch = text(li.querySelector("a"));
+            if (data.branch === null) {
+                break;
+            }
+        }
+    }
+}
+data.email = text(document.querySelector("div.email > a"));
+return data;
+"""
+
+
+@functools.lru_cache(maxsize=8192)
+def _titlecase(name: str) -> str:
+    '''Title case a member name.  The same names recur across many trips, so remember them.'''
+    return name.title()
+
+
+def _fast_text(el: WebElement) -> str:
+    '''An element's innerText, stripped.  Read as a DOM property; get_attribute would send a JS atom each call.'''
+    return (el.get_property("innerText") or "").strip()
+
+
+# Roster contacts within the roster tab (arguments[0]) that have a member link.
+_ROSTER_JS = """
+return Array.from(arguments[0].querySelectorAll("div.roster-contact")).filter(div => div.querySelector("a")).map(div => {
+    const link = div.querySelector("a");
+    const position = div.querySelector(".roster-position");
+    return {href: link.href, name: link.innerText.trim(), role: position ? position.innerText.trim() : null};
+});
+"""
+
+
+# Trip status from the text of the error box, first match wins: (lowercase phrase, status, result).
+# A status of None means past or future by date.  A closed trip with a result of None
+# takes its result from _CLOSED_RESULTS.
+_RESULT_ERROR_RULES = [
+    ("has been closed", ACTIVITY_STATUS_CLOSED, None),
+    ("this event has been canceled.", ACTIVITY_STATUS_CLOSED, ACTIVITY_RESULT_CANCELED),
+    # Events don't have result so assume success.
+    ("this event already ended", ACTIVITY_STATUS_CLOSED, ACTIVITY_RESULT_SUCCESS),
+    # An activity that has not been closed is marked in the past with no result.  It could yet change.
+    ("this activity already ended.", ACTIVITY_STATUS_CLOSED, ACTIVITY_RESULT_SUCCESS),
+    # Registration has closed but the trip has not run?
+    ("registration closed on", None, None),
+]
+_CLOSED_RESULTS = [
+    ("successful", ACTIVITY_RESULT_SUCCESS),
+    ("canceled", ACTIVITY_RESULT_CANCELED),
+    ("turned around", ACTIVITY_RESULT_TURNED_AROUND),
+]
+
+
+# Trip detail labels whose value is the rest of the list item text, and the ScrapedActivity field for each.
+# These values come from a small set (branch, difficulty, ...) and are interned.
+_LABEL_TO_ATTR = {
+    "Difficulty:": "difficulty",
+    "Leader Rating:": "leader_rating",
+    "Activity Type:": "activity_type",
+    "Branch:": "branch",
+}
+# The text each label starts its list item with.
+_LABEL_PREFIX = {label: label + " " for label in ("When:", "Committee:", *_LABEL_TO_ATTR)}
+
+
 ROLE_PAT = re.compile(r"^Role: (.*)$")
 STATUS_PAT = re.compile(r"^Status: (.*)$")
 
 class ScrapeMtnWeb():
 
-    _SINGLE_DATE_PAT = re.compile(r"^\w{3}, (\w{3} \d{1,2}, \d{4})$")
-    _DATE_TIME_PAT = re.compile(r"^\w{3}, (\w{3} \d{1,2}, \d{4}) from.*$")
-    _DATE_RANGE_PAT = re.compile(r"^\w{3}, (\w{3} \d{1,2}, \d{4}) . \w{3}, (\w{3} \d{1,2}, \d{4})$")
-    _DATE_FORMAT = "%b %d, %Y"
+    # A single date, a date with a time, or a date range.
+    _DATE_PAT = re.compile(r"^[A-Za-z]{3}, (?P<start>[A-Za-z]{3} \d{1,2}, \d{4})"
+                           r"(?: from.*| . [A-Za-z]{3}, (?P<end>[A-Za-z]{3} \d{1,2}, \d{4}))?$", re.ASCII)
+    _MONTHS = {"Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+               "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12}
 
 
-    def __init__(self, driver):
+    def __init__(self, driver, owns_driver: bool = True):
+        '''
+        Parameters:
+            driver:  The selenium web driver to scrape with.
+            owns_driver:  When False the driver is borrowed; close() leaves it running for the caller
+                          to reuse, e.g. with reset_session() between users.
+        '''
         self._driver = driver
+        self._owns_driver = owns_driver
         self._is_logged_in = False
         self.MTN_WEB_URL = econfig.get("MTN_WEB_URL")
         self.MTN_WEB_LOGIN = f"{self.MTN_WEB_URL}login"
@@ -140,58 +265,82 @@ class ScrapeMtnWeb():
         return False
 
     def close(self):
-        self._driver.quit()
+        if self._owns_driver:
+            self._driver.quit()
+
+    def reset_session(self):
+        '''Log out by clearing cookies and storage, keeping the browser open.'''
+        self._driver.delete_all_cookies()
+        self._driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        self._is_logged_in = False
 
 
     def wait_for_element1(self, parent, by, selector, timeout) -> bool:
-        def test_item(parent, by, selector):
-            try:
-                el = parent.find_element(by, selector)
-                if el.is_displayed():
-                    return True
-            except Exception:
-                pass
+        '''Wait until an element under parent is displayed.  Returns False on timeout.'''
+        wait = WebDriverWait(parent, timeout=timeout)
+        try:
+            wait.until(EC.visibility_of_element_located((by, selector)))
+        except TimeoutException:
             return False
-        
+        return True
+
+
+    def _safe_get(self, url: str):
+        '''Load a page, turning errors that may clear up on retry into WebResponseException.'''
+        try:
+            self._driver.get(url)
+        except WebDriverException as e:
+            if e.msg and ERROR_STRING_DNS in e.msg:
+                # A recognized error.  Delay before retrying.
+                raise WebResponseException(url, "DNS not found", DELAY_DNS_ERROR) from e
+            # Not a recognized error, raise it.
+            raise
+        except TimeoutError as e:
+            raise WebResponseException(url, "Timeout", DELAY_TIMEOUT) from e
+
+
+    def wait_for_present(self, by, selector, timeout=WAIT_PAGE_LOAD) -> bool:
+        '''Wait until an element is in the page.  Returns False on timeout.'''
         wait = WebDriverWait(self._driver, timeout=timeout)
         try:
-            wait.until(lambda x : test_item(parent, by, selector))
-        except Exception:
+            wait.until(EC.presence_of_element_located((by, selector)))
+        except TimeoutException:
             return False
         return True
  
 
+    def _parse_one_date(self, date_str: str) -> datetime.date:
+        '''Parse "Mon D, YYYY".'''
+        month, day, year = date_str.replace(",", "").split(" ")
+        return datetime.date(int(year), self._MONTHS[month], int(day))
+
+
     def parse_date(self, date_str: str) -> t.Tuple[datetime.date, datetime.date]:
-        M = self._SINGLE_DATE_PAT.match(date_str)
-        if M:
-            date = datetime.datetime.strptime(M.group(1), self._DATE_FORMAT).date()
-            return date, date
-        M = self._DATE_TIME_PAT.match(date_str)
-        if M:
-            date = datetime.datetime.strptime(M.group(1), self._DATE_FORMAT).date()
-            return date, date
-        M = self._DATE_RANGE_PAT.match(date_str)
-        if M:
-            start_date = datetime.datetime.strptime(M.group(1), self._DATE_FORMAT).date()
-            end_date = datetime.datetime.strptime(M.group(2), self._DATE_FORMAT).date()
-            return start_date, end_date
-        raise ValueError(f"Unrecognized date string: {date_str}")
+        M = self._DATE_PAT.match(date_str)
+        if M is None:
+            raise ValueError(f"Unrecognized date string: {date_str}")
+        try:
+            start_date = self._parse_one_date(M.group("start"))
+            end_date = self._parse_one_date(M.group("end")) if M.group("end") else start_date
+        except KeyError:
+            raise ValueError(f"Unrecognized date string: {date_str}")
+        return start_date, end_date
     
 
     def login(self, username: str, password: str):
         # TODO: check if already logged in
         self._driver.get(self.MTN_WEB_LOGIN)
-        time.sleep(2)  # Wait for the page to load
+        self.wait_for_present(By.ID, "__ac_name")
 
         # Fill in login credentials
         try:
             username_field = self._driver.find_element("id", "__ac_name")
         except Exception:
-            raise PageFormatException(self._driver.current_url, "username field")
+            raise PageFormatException(self.MTN_WEB_LOGIN, "username field")
         try:    
             password_field = self._driver.find_element("id", "__ac_password")
         except Exception:
-            raise PageFormatException(self._driver.current_url, "password: field")
+            raise PageFormatException(self.MTN_WEB_LOGIN, "password: field")
 
         username_field.send_keys(username)
         password_field.send_keys(password)
@@ -200,9 +349,10 @@ class ScrapeMtnWeb():
         try:
             login_button = self._driver.find_element("id", "buttons-login")
         except Exception:
-            raise PageFormatException(self._driver.current_url, "login button")
+            raise PageFormatException(self.MTN_WEB_LOGIN, "login button")
         login_button.click()
-        time.sleep(2)  # Wait for the next page to load
+        # Wait for the profile menu shown to a logged in user.
+        self.wait_for_present(By.CSS_SELECTOR, "li.user.menu")
 
         # TODO: Check if login was successful
 
@@ -216,7 +366,7 @@ class ScrapeMtnWeb():
         # Navigate to my profile page and scrape some information.
         #
         try:
-            profile_element = self._driver.find_element(By.XPATH, "//li[@class='user menu hide-on-mobile']")
+            profile_element = self._driver.find_element(By.CSS_SELECTOR, "li.user.menu.hide-on-mobile")
         except Exception:
             raise PageFormatException(self._driver.current_url, "user find profile icon in top bar")
         try:
@@ -232,7 +382,7 @@ class ScrapeMtnWeb():
         except Exception as e:
             raise WebResponseException(self._driver.current_url, "user click on My Profile") from e
 
-        time.sleep(2)
+        self.wait_for_present(By.CSS_SELECTOR, "div.profile-wrapper")
 
         return self._scrape_profile()
     
@@ -251,14 +401,7 @@ class ScrapeMtnWeb():
         if not profile_link.startswith("http"):
             profile_link = self.MTN_WEB_PROFILE + profile_link
 
-        try:
-            self._driver.get(profile_link)
-        except WebDriverException as e:
-            if ERROR_STRING_DNS in e.msg:
-                # A recognized error.  Delay for 5 minutes
-                raise WebResponseException(profile_link, "DNS not found", DELAY_DNS_ERROR) from e
-            # Not a recognized error, raise it.
-            raise
+        self._safe_get(profile_link)
         return self._scrape_profile()
     
 
@@ -271,37 +414,27 @@ class ScrapeMtnWeb():
             ScrapedUser object with the profile information.
         '''
 
+        # Read the whole profile in one script rather than a driver round trip per field.
+        data = self._driver.execute_script(_PROFILE_JS)
         user = ScrapedUser()
-        user.profile_url = self._driver.current_url
-        try:
-            profile_el = self._driver.find_element(By.XPATH, "//div[@class='profile-wrapper']")
-        except Exception:
-            raise PageFormatException(self._driver.current_url, "user profile wrapper")
-        try:
-            # /html/body/div[2]/div/div[2]/article/div/article/div[1]/div/div[1]/img
-            portrait_img_el = profile_el.find_element(By.XPATH, "//div[@class='portrait']/img")
-            user.portrait_url = portrait_img_el.get_attribute('src')
-        except Exception:
-            raise PageFormatException(self._driver.current_url, "user portrait")
-        try:
-            user.full_name = profile_el.find_element(By.TAG_NAME,"h1").text.title()
-        except Exception:
-            raise PageFormatException(self._driver.current_url, "user full name")
-        try:
-            #
-            # Details item contains one or more details including: Profile, Branch, Member since,
-            #
-            ul_el = profile_el.find_element(By.XPATH, "//ul[@class='details no-bullets']")
-            for li_el in ul_el.find_elements(By.TAG_NAME, "li"):
-                if "Branch" in li_el.text:
-                    user.branch = li_el.find_element(By.TAG_NAME, "a").text
-        except Exception:
-            raise PageFormatException(self._driver.current_url, "user branch")
-        try:
-            email_a_el = profile_el.find_element(By.XPATH,"//div[@class='email']/a")
-            user.email = email_a_el.text
-        except Exception:
-            raise PageFormatException(self._driver.current_url, "user email")
+        user.profile_url = data["url"]
+        if not data["has_wrapper"]:
+            raise PageFormatException(user.profile_url, "user profile wrapper")
+        if data["portrait_url"] is None:
+            raise PageFormatException(user.profile_url, "user portrait")
+        user.portrait_url = data["portrait_url"]
+        if data["full_name"] is None:
+            raise PageFormatException(user.profile_url, "user full name")
+        user.full_name = _titlecase(data["full_name"])
+        #
+        # Details item contains one or more details including: Profile, Branch, Member since,
+        #
+        if data["branch"] is None:
+            raise PageFormatException(user.profile_url, "user branch")
+        user.branch = data["branch"]
+        if data["email"] is None:
+            raise PageFormatException(user.profile_url, "user email")
+        user.email = data["email"]
        
         return  user
 
@@ -309,53 +442,60 @@ class ScrapeMtnWeb():
 
     def scrape_member_activities(self, profile_link: str) -> list[ScrapedActivityMember]:
         activities_link = profile_link + self.MTN_WEB_PAGE_ACTIVITIES
-        try:
-            self._driver.get(activities_link)
-        except WebDriverException as e:
-            if ERROR_STRING_DNS in e.msg:
-                # A recognized error.  Delay for 5 minutes
-                raise WebResponseException(activities_link, "DNS not found", DELAY_DNS_ERROR) from e
-            # Not a recognized error, raise it.
-            raise
+        self._safe_get(activities_link)
         
         #
         # Wait for history to load
         #
         # //*[@id="content"]/div/div/section/table/thead/tr/th[5]
         # #content > div > div > section > table > thead > tr > th:nth-child(5)
-        if not self.wait_for_element1(self._driver, By.XPATH, "//section/table[@class='listing']/thead/tr/th[5]", 60):
-            raise WebResponseException(self._driver.current_url, "trip history not loaded.")
-        time.sleep(2)
+        if not self.wait_for_element1(self._driver, By.CSS_SELECTOR, "section > table.listing > thead > tr > th:nth-of-type(5)", 60):
+            raise WebResponseException(activities_link, "trip history not loaded.")
+        # The rows are rendered after the header; a member with no history has none.
+        self.wait_for_present(By.CSS_SELECTOR, "tr.activity-listing")
 
         #
         # Enabled canceled trips
         #
         try:
-            items = self._driver.find_elements(By.XPATH, "//div[@class='filter']")
+            items = self._driver.find_elements(By.CSS_SELECTOR, "div.filter")
+            rows_before = self._driver.find_elements(By.CSS_SELECTOR, "tr.activity-listing")
         except Exception:
-            raise PageFormatException(self._driver.current_url, "activity filter items for canceled")
+            raise PageFormatException(activities_link, "activity filter items for canceled")
         is_canceled_enabled = False
         for item in items:
-            if item.text == 'Show canceled':
+            if _fast_text(item) == 'Show canceled':
                 try:
-                    cb = item.find_element(By.XPATH, "//input[@type='checkbox']")
+                    cb = item.find_element(By.CSS_SELECTOR, "input[type='checkbox']")
                     cb.click()
                     is_canceled_enabled = True
                     break
                 except Exception:
                     pass
             if not is_canceled_enabled:
-                raise PageFormatException(self._driver.current_url, "activity show canceled checkbox not found")
+                raise PageFormatException(activities_link, "activity show canceled checkbox not found")
+
+        # Wait for the listing to re-render.  If there are no canceled trips the
+        # rows may not change, so give up quietly after a short wait.
+        n_before = len(rows_before)
+        rerendered = [lambda d: len(d.find_elements(By.CSS_SELECTOR, "tr.activity-listing")) != n_before]
+        if rows_before:
+            rerendered.append(EC.staleness_of(rows_before[0]))
+        try:
+            WebDriverWait(self._driver, WAIT_RERENDER).until(EC.any_of(*rerendered))
+        except TimeoutException:
+            pass
 
         #
         # Get a list of all trips
         #     
         trip_list = []
         try:
-            web_trips = self._driver.find_elements(By.XPATH, "//tr[@class='activity-listing']")
+            # Read every row in one script rather than several driver round trips per row.
+            rows = self._driver.execute_script(_MEMBER_ACTIVITIES_JS)
         except Exception:  
-            raise PageFormatException(self._driver.current_url, "activity list of trips [activity-listing]")
-        for web_trip in web_trips:
+            raise PageFormatException(activities_link, "activity list of trips [activity-listing]")
+        for row in rows:
 
             #
             # Start collecting trip data.  Future and past trips have some same and some different fields.
@@ -366,58 +506,43 @@ class ScrapeMtnWeb():
             #
             # Table entry for Activity/Event has a link to the trip page.
             #
-            try:
-                ae_item = web_trip.find_element(By.CSS_SELECTOR, "td[data-th='Activity/Event']")
-            except Exception:
-                raise PageFormatException(self._driver.current_url, "activity table data for Activity/Event")
-            try:
-                ae_link = ae_item.find_element(By.TAG_NAME, "a")
-            except Exception:
-                raise PageFormatException(self._driver.current_url, "activity link for Activity/Event")
-            trip_member.activity_url = ae_link.get_attribute("href")
-            trip_member.activity_name = ae_link.text
+            if not row["has_ae"]:
+                raise PageFormatException(activities_link, "activity table data for Activity/Event")
+            if row["url"] is None:
+                raise PageFormatException(activities_link, "activity link for Activity/Event")
+            trip_member.activity_url = row["url"]
+            trip_member.activity_name = row["name"]
 
 
             #
-            # Now look for a field which will tell us if this item is future or past.
+            # A Status field tells us this item is in the future.
             #
-            try:
-                # /html/body/div[2]/div/div[2]/article/div/article/div/div/table/tbody/tr[1]/td[5]
-                trip_member.registration = web_trip.find_element(By.CSS_SELECTOR, "td[data-th='Status']").text
-                trip_member.is_future = True
-            except Exception:
-                pass
+            trip_member.is_future = row["status"] is not None
 
             if trip_member.is_future:
                 # Get additional future trip fields.
-                try:   
-                    trip_member.role = web_trip.find_element(By.CSS_SELECTOR, "td[data-th='Role']").text
-                except Exception:
-                    raise PageFormatException(self._driver.current_url, "activity table data for Role")
+                trip_member.registration = row["status"]
+                if row["role"] is None:
+                    raise PageFormatException(activities_link, "activity table data for Role")
+                trip_member.role = row["role"]
                 
             else:
                 # Get additional past trip fields.
                 # Role and personal result are in the same table cell.
-                try:
-                    rr = web_trip.find_element(By.CSS_SELECTOR, "td[data-th='Role: Result']")
-                except Exception:
-                    raise PageFormatException(self._driver.current_url, "activity table data for Role: Result")
-                try:
-                    rr_children = rr.find_elements(By.TAG_NAME, "span")
-                except Exception:
-                    raise PageFormatException(self._driver.current_url, "activity Role: Result children")
-                trip_member.role = rr_children[0].text
-                if len(rr_children) >= 3:
-                    trip_member.member_result = rr_children[2].text
-                try:
-                    trip_member.registration = web_trip.find_element(By.CSS_SELECTOR, "td[data-th='Registration Status'").text
-                except Exception:
-                    raise PageFormatException(self._driver.current_url, "activity table data for Registration Status")
-                try:
-                    tr_el = web_trip.find_element(By.CSS_SELECTOR, "td[data-th='Trip Result'")
-                    trip_member.activity_result = tr_el.text
-                except Exception:
-                    raise PageFormatException(self._driver.current_url, "activity table data for Trip Result")
+                rr_spans = row["rr_spans"]
+                if rr_spans is None:
+                    raise PageFormatException(activities_link, "activity table data for Role: Result")
+                if not rr_spans:
+                    raise PageFormatException(activities_link, "activity Role: Result children")
+                trip_member.role = rr_spans[0]
+                if len(rr_spans) >= 3:
+                    trip_member.member_result = rr_spans[2]
+                if row["registration"] is None:
+                    raise PageFormatException(activities_link, "activity table data for Registration Status")
+                trip_member.registration = row["registration"]
+                if row["trip_result"] is None:
+                    raise PageFormatException(activities_link, "activity table data for Trip Result")
+                trip_member.activity_result = row["trip_result"]
 
             trip_member.is_canceled = trip_member.registration == MEMBER_STATUS_CANCELED or trip_member.activity_result == MEMBER_RESULT_CANCELED
             trip_list.append(trip_member)
@@ -426,25 +551,23 @@ class ScrapeMtnWeb():
         
 
 
-    def get_trip_details(self, trip_link: str) -> ScrapedActivity:
-        try:
-            self._driver.get(trip_link)
-        except WebDriverException as e:
-            if ERROR_STRING_DNS in e.msg:
-                # A recognized error. 
-                raise WebResponseException(trip_link, "DNS not found", DELAY_DNS_ERROR) from e
-            # Not a recognized error, raise it.
-            raise
-        except TimeoutError as e:
-            raise WebResponseException(trip_link, "Timeout", DELAY_TIMEOUT) from e
-        time.sleep(2)
+    def get_trip_details(self, trip_link: str, reference_date: datetime.date | None = None) -> ScrapedActivity:
+        '''
+        Scrape a trip page.
+        Parameters:
+            trip_link:  The URL of the trip page.
+            reference_date:  The date that decides whether the trip is in the past.  Defaults to today;
+                             a batch scrape can pass one date for every trip.
+        '''
+        self._safe_get(trip_link)
+        self.wait_for_present(By.CSS_SELECTOR, "h1.documentFirstHeading")
 
         trip = ScrapedActivity()
         trip.url = trip_link
 
         # Trip name is in a header element.
         try:
-            trip.name = self._driver.find_element(By.XPATH, "//h1[@class='documentFirstHeading']").text
+            trip.name = _fast_text(self._driver.find_element(By.CSS_SELECTOR, "h1.documentFirstHeading"))
         except Exception:
             raise PageFormatException(trip_link, "trip name")
         
@@ -455,11 +578,11 @@ class ScrapeMtnWeb():
         #  which contains multiple lists:  <ul class="details">
         # So, find the <div> then all the <ul> within it.
         try:
-            core_element = self._driver.find_element(By.XPATH, "//div[@class='program-core']")
+            core_element = self._driver.find_element(By.CSS_SELECTOR, "div.program-core")
         except Exception:
             raise PageFormatException(trip_link, "trip details div[program-core]")
         try:
-            details_el_list = core_element.find_elements(By.XPATH, "//ul[@class='details']")
+            details_el_list = core_element.find_elements(By.CSS_SELECTOR, "ul[class='details']")
         except Exception:
             raise PageFormatException(trip_link, "trip details ul[details]")
         
@@ -478,32 +601,27 @@ class ScrapeMtnWeb():
                 label = ""
                 try:
                     label_el = detail_el.find_element(By.TAG_NAME, "label")
-                    label = label_el.text
+                    label = _fast_text(label_el)
                 except Exception:
                     pass
-                detail_el_text = detail_el.text
+                detail_el_text = _fast_text(detail_el)
 
                 if label == "" and not trip_date_str:
-                    trip_date_str = detail_el.text
+                    trip_date_str = detail_el_text
                 elif label == "When:":
-                    trip_date_str = detail_el_text.replace("When: ", "")
+                    trip_date_str = detail_el_text.removeprefix(_LABEL_PREFIX[label])
                 elif label == "Committee:":
                     # Sometimes the name appears in a link
                     try:
-                        trip.committee = detail_el.find_element(By.TAG_NAME, "a").text
+                        trip.committee = _fast_text(detail_el.find_element(By.TAG_NAME, "a"))
                     except Exception:
                         pass
                     if not trip.committee:
                         # Other times, not in a link
-                        trip.committee = detail_el_text.replace("Committee: ", "")
-                elif label == "Difficulty:":
-                    trip.difficulty = detail_el_text.replace("Difficulty: ", "")
-                elif label == "Leader Rating:":
-                    trip.leader_rating = detail_el_text.replace("Leader Rating: ", "")
-                elif label == "Activity Type:":
-                    trip.activity_type = detail_el_text.replace("Activity Type: ", "")
-                elif label == "Branch:":
-                    trip.branch = detail_el_text.replace("Branch: ", "")
+                        trip.committee = detail_el_text.removeprefix(_LABEL_PREFIX[label])
+                    trip.committee = sys.intern(trip.committee)
+                elif label in _LABEL_TO_ATTR:
+                    setattr(trip, _LABEL_TO_ATTR[label], sys.intern(detail_el_text.removeprefix(_LABEL_PREFIX[label])))
                 elif "Mileage:" in detail_el_text:
                     trip.milage = detail_el_text.replace("Mileage: ", "")
 
@@ -518,7 +636,9 @@ class ScrapeMtnWeb():
             trip.date_start, trip.date_end = self.parse_date(trip_date_str)
         except Exception:
             raise PageFormatException(trip_link, "trip date parse")
-        is_in_past = trip.date_end < datetime.date.today()
+        if reference_date is None:
+            reference_date = datetime.date.today()
+        is_in_past = trip.date_end < reference_date
 
         #
         # Find the route name and link.
@@ -535,7 +655,7 @@ class ScrapeMtnWeb():
             trip.route_url = route_el.get_attribute("href")
             try:
                 pel = route_el.find_element(By.XPATH, "../../..")
-                trip.route_name = pel.find_element(By.TAG_NAME, "h3").text
+                trip.route_name = _fast_text(pel.find_element(By.TAG_NAME, "h3"))
             except Exception:
                 raise PageFormatException(trip_link, "trip route name navigation")
 
@@ -547,50 +667,39 @@ class ScrapeMtnWeb():
         register_el: WebElement | None = None
         register_text: str = ""
         try:
-            result_error_el = self._driver.find_element(By.XPATH, "//div[@class='error']")
-            result_error_text = result_error_el.text
+            result_error_el = self._driver.find_element(By.CSS_SELECTOR, "div.error")
+            result_error_text = _fast_text(result_error_el)
         except Exception:
             pass
         try:
-            register_el = self._driver.find_element(By.XPATH, "//div[@id='register-participant']")
-            register_text = register_el.text
+            register_el = self._driver.find_element(By.CSS_SELECTOR, "div#register-participant")
+            register_text = _fast_text(register_el)
         except Exception: 
             pass
 
         if result_error_text:
-            #
-            # CASE:  found an item for closed trips.
-            #     
-            if "has been closed" in result_error_text:
-                trip.status = ACTIVITY_STATUS_CLOSED
-                if "successful" in result_error_text:
-                    trip.result = ACTIVITY_RESULT_SUCCESS
-                elif "canceled" in result_error_text:
-                    trip.result = ACTIVITY_RESULT_CANCELED
-                elif "turned around" in result_error_text:
-                    trip.result = ACTIVITY_RESULT_TURNED_AROUND               
-                else:
-                    trip.result = result_error_text.replace("This activity has been closed. ", "").strip()
-            elif 'This event has been canceled.' in result_error_text:
-                trip.status = ACTIVITY_STATUS_CLOSED
-                trip.result = ACTIVITY_RESULT_CANCELED            
-            elif 'This event already ended' in result_error_text:
-                # Events don't have result so assume success.
-                trip.status = ACTIVITY_STATUS_CLOSED
-                trip.result = ACTIVITY_RESULT_SUCCESS
-            elif 'This activity already ended.' in result_error_text:
-                 # An activity that has not been closed is marked in the past with no result.  It could yet change.
-                 trip.status = ACTIVITY_STATUS_CLOSED
-                 trip.result = ACTIVITY_RESULT_SUCCESS
-            elif 'Registration closed on' in result_error_text:
-                 # Registration has closed but the trip has not run?
-                 trip.status = ACTIVITY_STATUS_PAST if is_in_past else ACTIVITY_STATUS_FUTURE
+            lowered = result_error_text.lower()
+            for phrase, status, result in _RESULT_ERROR_RULES:
+                if phrase in lowered:
+                    break
             else:
                 # TODO:  Write error to log
                 # Another error:  You have a date conflict with another activity where you registered previously.
                 #   seen on: https://www.mountaineers.org/activities/activities/sea-kayak-skagit-hope-islands-65
                 # Should look for the "Register"/ "Register for waitlist" button and see if it is disabled.
-                trip.status = ACTIVITY_STATUS_PAST if is_in_past else ACTIVITY_STATUS_FUTURE
+                status, result = None, None
+            trip.status = status or (ACTIVITY_STATUS_PAST if is_in_past else ACTIVITY_STATUS_FUTURE)
+            if status == ACTIVITY_STATUS_CLOSED and result is None:
+                #
+                # CASE:  found an item for closed trips.
+                #
+                for phrase, result in _CLOSED_RESULTS:
+                    if phrase in lowered:
+                        break
+                else:
+                    result = result_error_text.replace("This activity has been closed. ", "").strip()
+            if result is not None:
+                trip.result = result
         else:
             if "This activity is part of the" in register_text:
                 #
@@ -619,7 +728,7 @@ class ScrapeMtnWeb():
         #
         # Find the roster element
         try:
-            roster_el = self._driver.find_element(By.XPATH, "//div[@data-tab='roster-tab']")
+            roster_el = self._driver.find_element(By.CSS_SELECTOR, "div[data-tab='roster-tab']")
         except Exception:
             raise PageFormatException(trip_link, "roster tab not found")
 
@@ -633,45 +742,93 @@ class ScrapeMtnWeb():
         #
         # Wait for the roster to load
         #
-        if not self.wait_for_element1(self._driver, By.XPATH, "//div[@class='tabs']/div[@data-tab='roster-tab']/div[@class='tab-content']/h3", 60):
+        if not self.wait_for_element1(self._driver, By.CSS_SELECTOR, "div.tabs > div[data-tab='roster-tab'] > div.tab-content > h3", 60):
             raise PageFormatException(trip_link, "roster tab not loaded")
-        time.sleep(2)
 
-        participants = set()
-        div_list = roster_el.find_elements(By.XPATH, "//div[@class='roster-contact']")
-        for div_el in div_list:
-            #
-            # Canceled trips may have the leader but no other members.  However,
-            # more than just the leader <div> is present.  
-            #
-            is_member_found = False
-            try:
-                # Look for member link.
-                member_link_el = div_el.find_element(By.TAG_NAME, "a")
-                is_member_found = True
-            except Exception:
-                # Sometimes there are empty entries in the list.  Skip over them
+        #
+        # Read the roster in one script.  Canceled trips may have the leader but no other members.
+        # However, more than just the leader <div> is present, and entries without a member link
+        # are skipped.
+        #
+        try:
+            roster = self._driver.execute_script(_ROSTER_JS, roster_el)
+        except Exception:
+            raise PageFormatException(trip_link, "roster contacts")
+        participants: dict[str, ScrapedActivityMember] = {}
+        for contact in roster:
+            member_url = contact["href"].replace("?ajax_load=1", "")
+            if member_url in participants:
                 continue
+            member = ScrapedActivityMember()
+            member.activity_name = trip.name
+            member.member_url = member_url
+            member.member_name = _titlecase(contact["name"])
+            member.role = sys.intern(contact["role"]) if contact["role"] is not None else "Participant"
+            member.registration = MEMBER_STATUS_REGISTERED
+            member.is_canceled = False
+            member.activity_url = trip_link
+            participants[member_url] = member
+        trip.participants = list(participants.values())
+        
+        return trip
 
-            if is_member_found:
-                member = ScrapedActivityMember()
-                member.activity_url = trip.url
-                member.activity_name = trip.name
-                member.member_url = member_link_el.get_attribute("href").replace("?ajax_load=1","")
-                member.member_name = member_link_el.text.title()
-                try:
-                    roster_position_el = div_el.find_element(By.CLASS_NAME, "roster-position")
-                    member.role = roster_position_el.text
-                except Exception:
-                    member.role = "Participant"
 
-                member.registration = MEMBER_STATUS_REGISTERED
-                member.is_canceled = False
-                member.activity_url = trip_link
 
-                if member.member_url not in participants:
-                    participants.add(member.member_url)
-                    trip.participants.append(member)
-        
-        return trip
+def scrape_trips_parallel(make_scraper: t.Callable[[], ScrapeMtnWeb], links: t.Iterable[str],
+                          n_workers: int = 4, try_count: int = 3,
+                          retry_delay: t.Callable[[int], float] | None = None) -> list[ScrapedActivity | None]:
+    '''
+    Get the details of many trips using several browsers at once.
+    Parameters:
+        make_scraper:  Makes a ready to use (logged in, if needed) scraper.  Called once per worker thread.
+        links:  The trip URLs.
+        n_workers:  The number of worker threads, and so browsers.
+        try_count:  Attempts per trip.  A WebResponseException or TimeoutError is retried.
+        retry_delay:  Seconds to wait after a failed attempt (0 based) when the error suggests no delay.
+                      Defaults to 60.
+    Returns:  The trip details in the order of links.  None for a trip that still failed after try_count
+              attempts, so the caller can fetch it again and report the error; the other trips are kept.
+    Raises:  Any other error, including one from make_scraper, after stopping the remaining fetches.
+    '''
+    local = threading.local()
+    today = datetime.date.today()
+    scrapers: list[ScrapeMtnWeb] = []
+    scrapers_lock = threading.Lock()
+    # Set on the first error that is not retried, so queued trips are skipped rather than fetched.
+    stop = threading.Event()
+
+    def get_trip(link: str) -> ScrapedActivity | None:
+        if stop.is_set():
+            return None
+        try:
+            scraper = getattr(local, "scraper", None)
+            if scraper is None:
+                scraper = local.scraper = make_scraper()
+                with scrapers_lock:
+                    scrapers.append(scraper)
+            for attempt in range(try_count):
+                try:
+                    return scraper.get_trip_details(link, today)
+                except (WebResponseException, TimeoutError) as e:
+                    if attempt == try_count - 1:
+                        return None
+                    delay = getattr(e, "delay_seconds", None)
+                    if not delay:
+                        delay = retry_delay(attempt) if retry_delay else 60
+                    time.sleep(delay)
+        except Exception:
+            stop.set()
+            raise
 
+    try:
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(get_trip, link) for link in links]
+            try:
+                return [future.result() for future in futures]
+            except BaseException:
+                stop.set()
+                executor.shutdown(cancel_futures=True)
+                raise
+    finally:
+        for scraper in scrapers:
+            scraper.close()
@@ -3,11 +3,10 @@ This module contains logic to scrape the mountaineers web site using mtnscrape
 and write to the database using mtndb.py (and SQLAlchemy directly).
 '''
 import datetime
+import random
 import time
+import typing as t
 import hashlib
-from sqlalchemy import select
-from sqlalchemy import create_engine
-from sqlalchemy.orm import object_session
 from sqlalchemy.orm import Session
 
 import mtnweb
@@ -18,6 +17,31 @@ from enum import Enum
 
 PROFILE_SCRAPE_INTERVAL = datetime.timedelta(days=7)
 
+# Changed activities written per commit while scraping a person's activities.
+COMMIT_BATCH_SIZE = 25
+
+# Constants for the activity scrape schedule.
+_MIDNIGHT = datetime.time(0, 0, 0)
+_TWELVE_HOURS = datetime.timedelta(hours=12)
+_ONE_DAY = datetime.timedelta(days=1)
+_ONE_WEEK = datetime.timedelta(days=7)
+_THREE_WEEKS = datetime.timedelta(days=21)
+_THIRTY_DAYS = datetime.timedelta(days=30)
+
+# Rescrape interval for a past activity by days since it ended.  Past the last threshold it is not rescraped.
+_PAST_SCHEDULE = ((7, _ONE_DAY), (90, _ONE_WEEK), (365, _THIRTY_DAYS))
+
+# Attempts to scrape an activity page, and the first and longest delay between attempts in seconds.
+ACTIVITY_SCRAPE_TRIES = 3
+RETRY_DELAY_BASE = 10
+RETRY_DELAY_MAX = 60
+
+
+def _retry_delay(attempt: int) -> float:
+    '''Exponential backoff with a little jitter so parallel scrapers don't retry in step.'''
+    return min(RETRY_DELAY_MAX, RETRY_DELAY_BASE * 2 ** attempt) + random.uniform(0, 2)
+
+
 class TimeStatus(Enum):
     FUTURE = "future"
     CURRENT = "current"
@@ -25,14 +49,30 @@ class TimeStatus(Enum):
 
 class Scrapester():
 
-    def __init__(self, mtn_web: mtnweb.ScrapeMtnWeb, mtn_db: mtndb.MtnDB, username: str, password: str, session: Session | None = None):
+    def __init__(self, mtn_web: mtnweb.ScrapeMtnWeb, mtn_db: mtndb.MtnDB, username: str, password: str, session: Session | None = None,
+                 make_mtn_web: t.Callable[[], mtnweb.ScrapeMtnWeb] | None = None, scrape_workers: int = 1,
+                 commit_batch_size: int = COMMIT_BATCH_SIZE):
+        '''
+        commit_batch_size:  Changed activities per commit in scrape_person_activity.  1 commits each activity.
+        make_mtn_web and scrape_workers:  When both are set (workers > 1), the trip pages a person's
+        activity scrape needs are fetched in parallel, each worker using a logged in scraper from make_mtn_web.
+        '''
         self.mtn_web = mtn_web
         self.mtn_db = mtn_db
         self.username = username
         self.password = password
+        # Stored with the login person's record.  Computed once here, not per profile scrape.
+        self._hashed_password = hashlib.sha256(password.encode("utf-8")).hexdigest() if password else ""
+        self.make_mtn_web = make_mtn_web
+        self.scrape_workers = scrape_workers
+        self.commit_batch_size = commit_batch_size
 
         self._is_scrape_future = False
         self.mtn_person: mtnschema.Person | None = None
+        # A person's activity memberships by activity URL, and whose they are.  Built when needed, dropped when
+        # memberships change.
+        self._am_by_url: dict[str, mtnschema.ActivityMember] | None = None
+        self._am_by_url_person_id: int | None = None
 
         if session:
             self._is_my_session = False
@@ -78,12 +118,14 @@ class Scrapester():
         #
         # Go to their profile and scrape it.  
         #
-        hashedpw = hashlib.sha256(self.password.encode("utf-8")).hexdigest()
         scraped_user = self.mtn_web.navigate_current_user_profile()
         if self.mtn_person is None:
-            self.mtn_person = self._user_add(scraped_user, self.username, hashedpw)
+            # They may already be here from someone else's roster, without a user name.
+            self.mtn_person = self.mtn_db.person_find_by_url(self._session, scraped_user.profile_url)
+        if self.mtn_person is None:
+            self.mtn_person = self._user_add(scraped_user, self.username, self._hashed_password)
         else:
-            self._user_update(self.mtn_person, scraped_user, self.username, hashedpw)
+            self._user_update(self.mtn_person, scraped_user, self.username, self._hashed_password)
         self._session.commit()
 
 
@@ -134,46 +176,40 @@ class Scrapester():
 
 
     @classmethod
-    def _activity_calculate_next_scrape(cls, mtn_activity: mtnschema.Activity) -> datetime.datetime | None:
+    def _activity_calculate_next_scrape(cls, mtn_activity: mtnschema.Activity, now: datetime.datetime | None = None) -> datetime.datetime | None:
+        if now is None:
+            now = datetime.datetime.now()
         delta: datetime.timedelta | None = None
-        time_end = datetime.datetime.combine(mtn_activity.date_end, datetime.time(0,0,0))
+        time_end = datetime.datetime.combine(mtn_activity.date_end, _MIDNIGHT)
         if mtn_activity.status == mtnweb.ACTIVITY_STATUS_FUTURE:
             # Future activities are scraped every 12 hours
-            delta = datetime.timedelta(hours=12)
+            delta = _TWELVE_HOURS
         elif mtn_activity.status == mtnweb.ACTIVITY_STATUS_PAST:
             # Past activities are scrapped in increasing intervals.
             # It might be closed eventually but then we give up.
-            time_closed = datetime.datetime.now() - time_end
+            days_closed = (now - time_end).days
+            delta = next((d for max_days, d in _PAST_SCHEDULE if days_closed < max_days), None)
+        else: # mtnweb.ACTIVITY_STATUS_CLOSED
+            time_closed = now - time_end
             if time_closed.days < 7:
-                delta = datetime.timedelta(days=1)
-            elif time_closed.days < 90:
-                delta = datetime.timedelta(days=7)
-            elif time_closed.days < 365:
-                delta = datetime.timedelta(days=30)
-            # More than 365 and we give up.
-        else: # mtnscrape.ACTIVITY_STATUS_CLOSED
-            time_closed = datetime.datetime.now() - time_end
-            if time_closed.days < 7:
-                # 
-                # 
-                #  we check more often.  Double the time since close but at least 6 hours.
+                # Recently closed, results may still change so we check more often.  Double the time
+                # since close but at least 6 hours.
                 delta = datetime.timedelta(seconds=max(60 * 60 * 6, 2 * time_closed.seconds))
-                # Over 90 days we assume all changes are complete.
             elif time_closed.days < 90:
                 # Within 90 days we still check for updates.
-                delta = datetime.timedelta(days=21)
+                delta = _THREE_WEEKS
                 # Over 90 days we assume all changes are complete.
 
         if delta:
-            return datetime.datetime.now() + delta
+            return now + delta
         return None
 
 
     @classmethod
-    def _time_status(cls, mtn_activity: mtnschema.Activity) -> TimeStatus:
-        time_start = datetime.datetime.combine(mtn_activity.date_start, datetime.time(0,0,0))
-        time_end = datetime.datetime.combine(mtn_activity.date_end, datetime.time(0,0,0)) + datetime.timedelta(days=1)
-        time_now = datetime.datetime.now()
+    def _time_status(cls, mtn_activity: mtnschema.Activity, now: datetime.datetime | None = None) -> TimeStatus:
+        time_start = datetime.datetime.combine(mtn_activity.date_start, _MIDNIGHT)
+        time_end = datetime.datetime.combine(mtn_activity.date_end, _MIDNIGHT) + _ONE_DAY
+        time_now = now if now is not None else datetime.datetime.now()
 
         if time_start > time_now:
             return TimeStatus.FUTURE
@@ -183,9 +219,17 @@ class Scrapester():
 
 
 
-    def _find_make_person_as_member(self, scp_activity_member: mtnweb.ScrapedActivityMember) -> mtnschema.Person:
-        '''find an existing person or create a new one from the details that came from their participation in an activity.'''
-        mtn_member_person = self.mtn_db.person_find_by_url(self._session, scp_activity_member.member_url)
+    def _find_make_person_as_member(self, scp_activity_member: mtnweb.ScrapedActivityMember,
+                                    known_people: dict[str, mtnschema.Person] | None = None) -> mtnschema.Person:
+        '''
+        find an existing person or create a new one from the details that came from their participation in an activity.
+        known_people, when given, holds everyone already found by URL (see _find_make_participants) and is searched
+        instead of the database.  A new person is added to it.
+        '''
+        if known_people is not None:
+            mtn_member_person = known_people.get(scp_activity_member.member_url)
+        else:
+            mtn_member_person = self.mtn_db.person_find_by_url(self._session, scp_activity_member.member_url)
         if not mtn_member_person:
             # Create a user with limited information and marking them as not yet scraped.
             mtn_member_person = mtnschema.Person(profile_url=scp_activity_member.member_url,
@@ -198,11 +242,36 @@ class Scrapester():
                                         is_scrapped=False,
                                         last_scrapped=None)
             self.mtn_db.person_add(self._session, mtn_member_person)
+            if known_people is not None:
+                known_people[scp_activity_member.member_url] = mtn_member_person
         return mtn_member_person
+
+
+    def _find_make_participants(self, scp_activity: mtnweb.ScrapedActivity) -> dict[str, mtnschema.Person]:
+        '''
+        The people for an activity's participants, by profile URL.  Those already in the database are found in one
+        query and the rest are created, marked as not yet scraped, in one insert.
+        '''
+        known_people = self.mtn_db.persons_find_by_urls(self._session, [p.member_url for p in scp_activity.participants])
+        missing = {p.member_url: p for p in scp_activity.participants if p.member_url not in known_people}
+        if missing:
+            known_people.update(self.mtn_db.persons_insert(self._session, [
+                dict(profile_url=scp_activity_member.member_url,
+                     user_name="",
+                     password="",
+                     full_name=scp_activity_member.member_name,
+                     portrait_url="",
+                     email="",
+                     branch="",
+                     is_scrapped=False,
+                     last_scrapped=None)
+                for scp_activity_member in missing.values()]))
+        return known_people
     
 
 
     def _activity_add(self, scp_activity: mtnweb.ScrapedActivity) -> mtnschema.Activity:
+        now = datetime.datetime.now()
         #
         # Create the activity.
         #
@@ -220,39 +289,48 @@ class Scrapester():
                                         route_link=scp_activity.route_url,
                                         status=scp_activity.status,
                                         result=scp_activity.result,
-                                        scrapped_at=datetime.datetime.now(),
+                                        scrapped_at=now,
                                         )
-        mtn_activity.next_scrape = self._activity_calculate_next_scrape(mtn_activity)
+        mtn_activity.next_scrape = self._activity_calculate_next_scrape(mtn_activity, now)
 
         #
-        # Create relationships for the participants
+        # Find or make the people on the roster.
         #
-        for scp_participant in scp_activity.participants:
-            
-            # Find the person
-            mtn_member_person = self._find_make_person_as_member(scp_participant)
-
-            # Add the person to the activity
-            # Don't need to add new mtn_am to mtn_activity or mtn_member_user, because the relationship is bidirectional.
-            mtn_am = mtnschema.ActivityMember(  # noqa: F841
-                person=mtn_member_person,
-                activity=mtn_activity,
-                role=scp_participant.role,
-                is_canceled=scp_participant.is_canceled,
-                registration=scp_participant.registration,
-                member_result=mtn_activity.result)
-            self._session.add(mtn_am)
-            print (f"  Added {mtn_member_person.full_name}")
-
+        known_people = self._find_make_participants(scp_activity)
+        members = [(self._find_make_person_as_member(scp_participant, known_people), scp_participant)
+                        for scp_participant in scp_activity.participants]
 
         #
-        # Add the activity to the database
+        # Add the activity to the database.  Flush so it and any new people have ids.
         #
         self.mtn_db.activity_add(self._session, mtn_activity)
+        self._session.flush()
+
+        #
+        # Create relationships for the participants, all in one statement.
+        #
+        self.mtn_db.activitymembers_insert(self._session, [
+            dict(person_id=mtn_member_person.id,
+                 activity_id=mtn_activity.id,
+                 role=scp_participant.role,
+                 is_canceled=scp_participant.is_canceled,
+                 registration=scp_participant.registration,
+                 member_result=mtn_activity.result)
+            for mtn_member_person, scp_participant in members])
+        # The insert went around the ORM, so have the member lists reload before they are next used.
+        self._session.expire(mtn_activity, ["member_list"])
+        for mtn_member_person, _ in members:
+            self._session.expire(mtn_member_person, ["activity_list"])
+        if members:
+            print ("\n".join(f"  Added {mtn_member_person.full_name}" for mtn_member_person, _ in members))
+
+        self._copaddler_refresh(mtn_activity)
+        return mtn_activity
 
 
 
     def _activity_update(self, mtn_activity: mtnschema.Activity, scp_activity: mtnweb.ScrapedActivity) -> mtnschema.Activity:
+        now = datetime.datetime.now()
         #
         # Update the activity.
         #
@@ -270,8 +348,8 @@ class Scrapester():
         mtn_activity.route_link = scp_activity.route_url
         mtn_activity.status = scp_activity.status
         mtn_activity.result = scp_activity.result
-        mtn_activity.scrapped_at = datetime.datetime.now()
-        mtn_activity.next_scrape = self._activity_calculate_next_scrape(mtn_activity)
+        mtn_activity.scrapped_at = now
+        mtn_activity.next_scrape = self._activity_calculate_next_scrape(mtn_activity, now)
         mtn_activity.scrape_error = ""
         mtn_activity.scrape_error_count = 0
         mtn_activity.scrape_error_time = None
@@ -279,23 +357,37 @@ class Scrapester():
         #
         # Edit the participant list
         #
-        existing_am: list[mtnschema.ActivityMember] = []
-        existing_am.extend(mtn_activity.member_list)
+        # The current members by person, loaded with their people in one go.  Those left over at the end were removed.
+        self.mtn_db.activity_members_load(self._session, mtn_activity)
+        # A database from before the unique (person, activity) index may hold more than one record for a
+        # person; the extras are removed.
+        existing_am: dict[int, mtnschema.ActivityMember] = {}
+        duplicate_am: list[mtnschema.ActivityMember] = []
+        for am in mtn_activity.member_list:
+            if am.person_id in existing_am:
+                duplicate_am.append(am)
+            else:
+                existing_am[am.person_id] = am
+        known_people = self._find_make_participants(scp_activity)
+        is_members_changed = False
+        # Roster report lines, printed together once the roster is done.
+        lines: list[str] = []
         for index, scp_participant in enumerate(scp_activity.participants):
             
             # Find the person
-            mtn_member_person = self._find_make_person_as_member(scp_participant)
+            mtn_member_person = self._find_make_person_as_member(scp_participant, known_people)
 
-            # Find the ActivityMember record
-            mtn_am = self.mtn_db.activitymember_find(self._session, mtn_member_person.id, mtn_activity.id)
+            # Find the ActivityMember record.  A person not yet flushed cannot have one.
+            mtn_am = None
+            if mtn_member_person.id is not None:
+                mtn_am = existing_am.pop(mtn_member_person.id, None)
             if mtn_am:
                 # Update the record
                 mtn_am.role = scp_participant.role
                 mtn_am.is_canceled = scp_participant.is_canceled
                 mtn_am.registration = scp_participant.registration
                 mtn_am.member_result = scp_participant.member_result
-                existing_am.remove(mtn_am)
-                print (f"  {index+1:>2}: {mtn_member_person.full_name} - {scp_participant.role}")
+                lines.append(f"  {index+1:>2}: {mtn_member_person.full_name} - {scp_participant.role}")
             else:
                 # Add the person to the activity
                 mtn_am = mtnschema.ActivityMember(
@@ -307,50 +399,56 @@ class Scrapester():
                     member_result=mtn_activity.result)
                 mtn_activity.member_list.append(mtn_am)
                 self._session.add(mtn_am)
-                print (f"  {index+1:>2}: {mtn_member_person.full_name} - {scp_participant.role} - Added")
+                is_members_changed = True
+                lines.append(f"  {index+1:>2}: {mtn_member_person.full_name} - {scp_participant.role} - Added")
 
 
         # Remove any remaining ActivityMember records
-        for am in existing_am:
+        for am in (*existing_am.values(), *duplicate_am):
             self._session.delete(am)
-            print (f"  {mtn_member_person.full_name} - Removed")
+            lines.append(f"  {am.person.full_name} - Removed")
+            is_members_changed = True
+        if lines:
+            print ("\n".join(lines))
+        # Nothing to rebuild when only the activity's details or members' roles changed.
+        if is_members_changed:
+            self._copaddler_refresh(mtn_activity)
         return mtn_activity
 
 
+    def _copaddler_refresh(self, mtn_activity: mtnschema.Activity):
+        '''Bring the copaddler summary up to date with the activity's member list.'''
+        # Every change to an activity's members comes through here, so also drop the membership index.
+        self._am_by_url = None
+        self.mtn_db.copaddler_refresh(self._session, [mtn_activity.id])
+
+
 
     def _activity_scrape(self, activity_link: str) -> mtnweb.ScrapedActivity:
         # Retry multiple times until load is complete.  Some errors may resolve with delay and retry.
-        is_complete = False    
-        try_count = 3
-        while not is_complete:
-            is_complete = True    # Assume success
-            try_count -= 1
+        for attempt in range(ACTIVITY_SCRAPE_TRIES):
+            is_last = attempt == ACTIVITY_SCRAPE_TRIES - 1
             try:
-                td = self.mtn_web.get_trip_details(activity_link)
-                return td
-                
+                return self.mtn_web.get_trip_details(activity_link)
 
             except mtnweb.WebResponseException as e:
                 # An error interacting with the site which might resolve on retry.
                 print (f"  retryable error {e.page_link} item {e.message}.")
                 if e.__context__:
                     print (f"    cause: {type(e.__context__)} : {e.args}") 
-                if try_count == 0:
+                if is_last:
                     raise
-            
                 # traceback.print_exc()
-                is_complete = False
-                delay = e.delay_seconds if e.delay_seconds else 60
-                print (f"  Will retry in {delay} seconds")
-                time.sleep(delay)
+                delay = e.delay_seconds if e.delay_seconds else _retry_delay(attempt)
 
             except TimeoutError as e:
                 print (f"  timeout on {activity_link} item {e.args}.")
-                if try_count == 0:
+                if is_last:
                     raise
-                print ("  Will retry")
+                delay = _retry_delay(attempt)
 
-            time.sleep(20)
+            print (f"  Will retry in {delay:.0f} seconds")
+            time.sleep(delay)
 
         return None
 
@@ -358,11 +456,23 @@ class Scrapester():
 
 
 
-    def _find_activity_member_by_url(self, activity_url: str) -> mtnschema.ActivityMember | None:
-        for am in self.mtn_person.activity_list:
-            if am.activity.activity_url == activity_url:
-                return am
-        return None
+    def _is_activity_scrape_needed(self, scp_am: mtnweb.ScrapedActivityMember, mtn_activity: mtnschema.Activity | None,
+                                   now: datetime.datetime) -> bool:
+        '''Does an activity from a person's activity list need its trip page scraped?'''
+        if scp_am.is_canceled:
+            # Canceled activities are only removed from the person, never scraped.
+            return False
+        if mtn_activity is None:
+            return True
+        return (mtn_activity.next_scrape is not None and mtn_activity.next_scrape <= now) \
+                    or (self._is_scrape_future and self._time_status(mtn_activity, now) == TimeStatus.FUTURE)
+
+
+    def _find_activity_member_by_url(self, person: mtnschema.Person, activity_url: str) -> mtnschema.ActivityMember | None:
+        if self._am_by_url is None or self._am_by_url_person_id != person.id:
+            self._am_by_url = self.mtn_db.activitymembers_by_activity_url(self._session, person.id)
+            self._am_by_url_person_id = person.id
+        return self._am_by_url.get(activity_url)
 
 
 
@@ -412,56 +522,94 @@ class Scrapester():
         scp_member_activity_list = self.mtn_web.scrape_member_activities(target_person.profile_url)
 
 
-        for scp_am in scp_member_activity_list:
-            #
-            # Find the activity
-            #
-            mtn_activity = self.mtn_db.activity_find_by_url(self._session, scp_am.activity_url)
-
-            if mtn_activity:
-                time_status = self._time_status(mtn_activity)
-                if scp_am.is_canceled:
-                    mtn_activity_member = self._find_activity_member_by_url(scp_am.activity_url)
-                    if mtn_activity_member in target_person.activity_list:
-                        print(f"{scp_am.registration}: {scp_am.activity_url} - {mtn_activity.date_start}")
-                        target_person.activity_list.remove(mtn_activity_member)
-                        self._session.delete(mtn_activity_member)
-                        print ("  Canceled from activity")
-                else:
-                    # Exists, check if it needs to be updated.
-                    is_scrape = (mtn_activity.next_scrape is not None and mtn_activity.next_scrape <= datetime.datetime.now()) \
-                                    or (self._is_scrape_future and time_status == TimeStatus.FUTURE)
-                    if is_scrape:
-                        print(f"{scp_am.registration}: {scp_am.activity_url} - {mtn_activity.date_start}")
-                        print("  Updating")
-                        try:
-                            scp_activity = self._activity_scrape(scp_am.activity_url)
-                        except mtnweb.WebResponseException as e:
-                            print (f"  scrape error {e.page_link} item {e.message}.")
-                            if e.__context__:
-                                print (f"    cause: {type(e.__context__)} : {e.args}") 
-                            # TODO: record failure.  
-                            raise         
-                        if scp_activity is not None:
-                            self._activity_update(mtn_activity, scp_activity)
-                            # TODO: catch and report, retry later, and notify.
-                    # else - not yet time to update
-            else:
-                if scp_am.is_canceled:
-                    # No action on canceled activity that is not in the database.
-                    pass
+        # Find all the listed activities already in the database in one query.
+        mtn_activities = self.mtn_db.activities_find_by_urls(self._session, [scp_am.activity_url for scp_am in scp_member_activity_list])
+
+        #
+        # Fetch the trip pages that will be needed in parallel, if set up to.  Database writes stay in this thread.
+        #
+        prefetched: dict[str, mtnweb.ScrapedActivity] = {}
+        if self.make_mtn_web is not None and self.scrape_workers > 1:
+            now = datetime.datetime.now()
+            links = [scp_am.activity_url for scp_am in scp_member_activity_list
+                        if self._is_activity_scrape_needed(scp_am, mtn_activities.get(scp_am.activity_url), now)]
+            if links:
+                print (f"Fetching {len(links)} activities with {self.scrape_workers} workers")
+                # A page the workers could not get is left out, and fetched again below with the usual reporting.
+                fetched = mtnweb.scrape_trips_parallel(self.make_mtn_web, links, self.scrape_workers,
+                                                       try_count=ACTIVITY_SCRAPE_TRIES, retry_delay=_retry_delay)
+                prefetched = {link: td for link, td in zip(links, fetched) if td is not None}
+
+
+        def scrape_activity(activity_url: str) -> mtnweb.ScrapedActivity | None:
+            '''
+            Get an activity's page.  A scrape error happens before that activity touches the session, so the
+            activities already written are committed before the error is raised rather than rolled back.
+            '''
+            try:
+                return prefetched.get(activity_url) or self._activity_scrape(activity_url)
+            except mtnweb.WebResponseException as e:
+                print (f"  scrape error {e.page_link} item {e.message}.")
+                if e.__context__:
+                    print (f"    cause: {type(e.__context__)} : {e.args}") 
+                # TODO: record failure, retry later, and notify.
+                self._session.commit()
+                raise
+            except Exception:
+                self._session.commit()
+                raise
+
+        #
+        # Write the changes, committing every commit_batch_size changed activities.  On an error while
+        # writing the uncommitted activities are rolled back; they are still due and get scraped again next run.
+        #
+        pending = 0
+        try:
+            for scp_am in scp_member_activity_list:
+                #
+                # Find the activity
+                #
+                mtn_activity = mtn_activities.get(scp_am.activity_url)
+
+                if mtn_activity:
+                    if scp_am.is_canceled:
+                        mtn_activity_member = self._find_activity_member_by_url(target_person, scp_am.activity_url)
+                        if mtn_activity_member is not None:
+                            print(f"{scp_am.registration}: {scp_am.activity_url} - {mtn_activity.date_start}")
+                            self._session.delete(mtn_activity_member)
+                            # Reload the person's activities on next use rather than search the list now.
+                            self._session.expire(target_person, ["activity_list"])
+                            self._copaddler_refresh(mtn_activity)
+                            print ("  Canceled from activity")
+                            pending += 1
+                    else:
+                        # Exists, check if it needs to be updated.
+                        if self._is_activity_scrape_needed(scp_am, mtn_activity, datetime.datetime.now()):
+                            print(f"{scp_am.registration}: {scp_am.activity_url} - {mtn_activity.date_start}")
+                            print("  Updating")
+                            scp_activity = scrape_activity(scp_am.activity_url)
+                            if scp_activity is not None:
+                                self._activity_update(mtn_activity, scp_activity)
+                                pending += 1
+                                # TODO: catch and report, retry later, and notify.
+                        # else - not yet time to update
                 else:
-                    print(f"{scp_am.registration}: {scp_am.activity_url}")
-                    print ("  Creating")    
-                    try:
-                        scp_activity = self._activity_scrape(scp_am.activity_url)
+                    if scp_am.is_canceled:
+                        # No action on canceled activity that is not in the database.
+                        pass
+                    else:
+                        print(f"{scp_am.registration}: {scp_am.activity_url}")
+                        print ("  Creating")    
+                        scp_activity = scrape_activity(scp_am.activity_url)
                         if scp_activity:
                             print (f"  {scp_activity.name}: {scp_activity.status}, {scp_activity.date_start}, {scp_activity.result}")
                             mtn_activity = self._activity_add(scp_activity)
-                    except mtnweb.WebResponseException as e:
-                        print (f"  scrape error {e.page_link} item {e.message}.")
-                        if e.__context__:
-                            print (f"    cause: {type(e.__context__)} : {e.args}") 
-                        raise             
-                        # TODO: else some record of the failure, retry later, and notify.
+                            mtn_activities[scp_am.activity_url] = mtn_activity
+                            pending += 1
+                if pending >= self.commit_batch_size:
+                    self._session.commit()
+                    pending = 0
             self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
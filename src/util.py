@@ -1,48 +1,72 @@
 import datetime
+import functools
 import re
-from selenium import webdriver
-from sqlalchemy import create_engine
+import typing as t
+from sqlalchemy import create_engine, make_url
 
 import mtndb
-import mtnweb
 import econfig
 
-YEAR_FIRST_DATE_PAT = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
-DAY_FIRST_DASH_DATE_PAT = re.compile(r"(\d{1,2})-(\d{1,2})-(\d{4})")
-DAY_FIRST_SLASH_DATE_PAT = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
-YEAR_FIRST_DATE = "%Y-%m-%d"
-DAY_FIRST_DASH_DATE = "%m-%d-%Y"
-DAY_FIRST_SLASH_DATE = "%m/%d/%Y"
+if t.TYPE_CHECKING:
+    import mtnweb
 
+# Year first (2024-03-05), month first with dashes (03-05-2024) or with slashes (03/05/2024).
+DATE_PAT = re.compile(r"(?:(?P<y1>\d{4})-(?P<m1>\d{1,2})-(?P<d1>\d{1,2})"
+                      r"|(?P<m2>\d{1,2})-(?P<d2>\d{1,2})-(?P<y2>\d{4})"
+                      r"|(?P<m3>\d{1,2})/(?P<d3>\d{1,2})/(?P<y3>\d{4}))")
+
+@functools.lru_cache(maxsize=256)
 def parse_date(date_str: str) -> datetime.date:
-    M = YEAR_FIRST_DATE_PAT.match(date_str)
-    if M:
-        date = datetime.datetime.strptime(date_str, YEAR_FIRST_DATE).date()
-        return date
-    M = DAY_FIRST_DASH_DATE_PAT.match(date_str)
-    if M:
-        date = datetime.datetime.strptime(date_str, DAY_FIRST_DASH_DATE).date()
-        return date
-    M = DAY_FIRST_SLASH_DATE_PAT.match(date_str)
-    if M:
-        date = datetime.datetime.strptime(date_str, DAY_FIRST_SLASH_DATE).date()
-        return date
-    raise ValueError(f"Unrecognized date string: {date_str}")
+    # Fast path for the common ISO form (2024-03-05).
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+        try:
+            return datetime.date.fromisoformat(date_str)
+        except ValueError:
+            pass
+    M = DATE_PAT.fullmatch(date_str)
+    if not M:
+        raise ValueError(f"Unrecognized date string: {date_str}")
+    g = M.group
+    year = g("y1") or g("y2") or g("y3")
+    month = g("m1") or g("m2") or g("m3")
+    day = g("d1") or g("d2") or g("d3")
+    return datetime.date(int(year), int(month), int(day))
+
 
 
 
+def build_driver(is_visible: bool = False):
+    '''Start a Firefox web driver set up for scraping.'''
+    # Selenium is slow to import, so only pay for it when a browser is needed.
+    from selenium import webdriver
 
-def make_mtnweb(is_visible: bool = False) -> mtnweb.ScrapeMtnWeb:
     options = webdriver.FirefoxOptions()
     options.binary_location = econfig.get(econfig.FIREFOX_PATH)
     if not is_visible: 
         options.add_argument("-headless")
-    driver = webdriver.Firefox(options=options)
-    mtn_web = mtnweb.ScrapeMtnWeb(driver)
+    # The scrape reads text and image URLs only, so skip downloading images.
+    # Javascript stays on; the site needs it.
+    options.set_preference("permissions.default.image", 2)
+    options.set_preference("permissions.default.desktop-notification", 2)
+    # One page at a time needs only one content process.
+    options.set_preference("dom.ipc.processCount", 1)
+    return webdriver.Firefox(options=options)
+
+
+def make_mtnweb(is_visible: bool = False) -> "mtnweb.ScrapeMtnWeb":
+    import mtnweb
+
+    mtn_web = mtnweb.ScrapeMtnWeb(build_driver(is_visible))
     return mtn_web
 
 
 def make_mtndb(is_echo: bool = False) -> mtndb.MtnDB:
-    engine = create_engine(econfig.get(econfig.DATABASE_URL), echo=is_echo)
+    url = make_url(econfig.get(econfig.DATABASE_URL))
+    # A scrape can hold its session for hours.  Check connections before use and replace old ones so a
+    # connection the server dropped is not found dead mid-scrape.
+    engine_args: dict[str, t.Any] = dict(echo=is_echo, pool_pre_ping=True, pool_recycle=1800)
+    if url.get_backend_name() == "postgresql":
+        engine_args.update(pool_size=4, max_overflow=0, connect_args={"connect_timeout": 10})
+    engine = create_engine(url, **engine_args)
     mtn_db = mtndb.MtnDB(engine)
     return mtn_db
@@ -6,21 +6,28 @@ This program performs comprehensive testing of PostgreSQL connectivity
 including network, authentication, and database-specific checks.
 """
 
+import os
 import sys
 import socket
-from pathlib import Path
+from urllib.parse import unquote, urlsplit
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 import psycopg
 
-# Add the src directory to Python path so we can import our modules
-src_path = Path(__file__).parent / "src"
-sys.path.insert(0, str(src_path))
+# Add the src directory, beside this one, to Python path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
 
 # Import our custom modules after adding to path
 import econfig  # noqa: E402
 
 
+def _parse_db_url(database_url):
+    """Split a database URL into (username, password, host, port, database)."""
+    u = urlsplit(database_url)
+    return (unquote(u.username or ""), unquote(u.password or ""),
+            u.hostname, u.port or 5432, u.path.lstrip("/"))
+
+
 def test_basic_connectivity(host, port):
     """Test basic TCP connectivity to the host and port."""
     print(f"🌐 Testing basic TCP connectivity to {host}:{port}")
@@ -97,24 +104,7 @@ def test_sqlalchemy_connection(database_url):
     
     try:
         # Parse the URL to get connection details
-        if "://" in database_url:
-            parts = database_url.split("://", 1)[1]  # Remove protocol
-            if "@" in parts:
-                auth_part, host_part = parts.split("@", 1)
-                if ":" in auth_part:
-                    username, password = auth_part.split(":", 1)
-                else:
-                    username, password = auth_part, ""
-                    
-                if "/" in host_part:
-                    host_port, database = host_part.split("/", 1)
-                    if ":" in host_port:
-                        host, port = host_port.split(":", 1)
-                        port = int(port)
-                    else:
-                        host, port = host_port, 5432
-                else:
-                    host, port, database = host_part, 5432, ""
+        username, _, host, port, database = _parse_db_url(database_url)
         
         print(f"   Parsed connection: {username}@{host}:{port}/{database}")
         
@@ -189,24 +179,7 @@ def run_comprehensive_diagnostics():
     
     # Parse connection details
     try:
-        if "://" in database_url:
-            parts = database_url.split("://", 1)[1]
-            if "@" in parts:
-                auth_part, host_part = parts.split("@", 1)
-                if ":" in auth_part:
-                    username, password = auth_part.split(":", 1)
-                else:
-                    username, password = auth_part, ""
-                    
-                if "/" in host_part:
-                    host_port, database = host_part.split("/", 1)
-                    if ":" in host_port:
-                        host, port = host_port.split(":", 1)
-                        port = int(port)
-                    else:
-                        host, port = host_port, 5432
-                else:
-                    host, port, database = host_part, 5432, ""
+        username, password, host, port, database = _parse_db_url(database_url)
     except Exception as e:
         print(f"❌ Failed to parse database URL: {e}")
         return False
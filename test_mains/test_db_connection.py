@@ -6,85 +6,95 @@ This program tests the database connection using the same configuration
 system as your main application to help isolate connection issues.
 """
 
+import os
 import sys
-from pathlib import Path
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import SQLAlchemyError
+from urllib.parse import urlsplit, urlunsplit
 
-# Add the src directory to Python path so we can import our modules
-src_path = Path(__file__).parent / "src"
-sys.path.insert(0, str(src_path))
+# Add the src directory, beside this one, to Python path so we can import our modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+_BANNER = "=" * 50
+
+_TROUBLESHOOTING_TIPS = """
+🔍 Troubleshooting tips:
+   1. Verify the database server is running
+   2. Check if the host and port are correct
+   3. Verify username and password are correct
+   4. Ensure the database name exists
+   5. Check firewall settings"""
+
+# The database URL, read from the environment once per process.
+_database_url: str | None = None
+
+
+def _load_database_url() -> str | None:
+    """Load the env file and read DATABASE_URL the first time only."""
+    global _database_url
+    if _database_url is None:
+        import econfig
+        econfig.load_env()
+        _database_url = econfig.get(econfig.DATABASE_URL)
+    return _database_url
 
-# Import our custom modules after adding to path
-import econfig  # noqa: E402
 
 def test_database_connection():
     """Test the PostgreSQL database connection."""
     print("🔧 Testing PostgreSQL Database Connection")
-    print("=" * 50)
+    print(_BANNER)
     
     # Load environment variables
     print("📋 Loading environment configuration...")
-    econfig.load_env()
-    
-    # Get database URL
-    database_url = econfig.get(econfig.DATABASE_URL)
+    database_url = _load_database_url()
     if not database_url:
         print("❌ ERROR: DATABASE_URL not found in environment variables")
         print("   Make sure your .env file contains a DATABASE_URL setting")
         return False
-    
-    print(f"🔗 Database URL: {database_url}")
+
+    # SQLAlchemy is slow to import, so only pay for it once there is a URL to test.
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import SQLAlchemyError
+    from sqlalchemy.pool import NullPool
     
     # Mask password in URL for display purposes
     display_url = database_url
-    if "@" in display_url and ":" in display_url:
-        parts = display_url.split("@")
-        if len(parts) == 2:
-            auth_part = parts[0]
-            if "://" in auth_part:
-                protocol_user = auth_part.split("://")[1]
-                if ":" in protocol_user:
-                    masked = display_url.replace(protocol_user.split(":")[1].split("@")[0], "***")
-                    display_url = masked
+    u = urlsplit(database_url)
+    if u.password:
+        display_url = urlunsplit(u._replace(netloc=u.netloc.replace(f":{u.password}@", ":***@", 1)))
     
     print(f"📡 Connecting to: {display_url}")
     
     try:
-        # Create engine
+        # Create engine.  Only one connection is made, so there is no pool to keep.
         print("🔨 Creating SQLAlchemy engine...")
-        engine = create_engine(database_url, echo=False)
+        engine = create_engine(database_url, echo=False, poolclass=NullPool, connect_args={"connect_timeout": 5})
         
         # Test connection
         print("🔌 Testing database connection...")
-        with engine.connect() as connection:
+        with engine.begin() as connection:
             # Execute a simple query
-            result = connection.execute(text("SELECT version()"))
-            version = result.fetchone()[0]
+            result = connection.exec_driver_sql("SELECT version()")
+            version = result.scalar()
             print("✅ Connection successful!")
             print(f"📊 PostgreSQL version: {version}")
             
             # Test a simple table query (if any tables exist)
             print("\n🔍 Testing table access...")
             try:
-                result = connection.execute(text("""
+                result = connection.exec_driver_sql("""
                     SELECT table_name 
                     FROM information_schema.tables 
                     WHERE table_schema = 'public'
                     LIMIT 5
-                """))
-                tables = result.fetchall()
+                """)
+                tables = result.fetchmany(5)
                 if tables:
-                    print(f"📋 Found {len(tables)} table(s) in public schema:")
-                    for table in tables:
-                        print(f"   - {table[0]}")
+                    print("\n".join([f"📋 Found {len(tables)} table(s) in public schema:",
+                                     *(f"   - {table[0]}" for table in tables)]))
                 else:
                     print("📋 No tables found in public schema (this might be expected)")
             except SQLAlchemyError as e:
                 print(f"⚠️  Could not query tables: {e}")
         
-        # Clean up
-        engine.dispose()
         print("\n✅ Database connection test completed successfully!")
         return True
         
@@ -92,12 +102,7 @@ def test_database_connection():
         print("❌ Database connection failed!")
         print(f"   Error type: {type(e).__name__}")
         print(f"   Error message: {e}")
-        print("\n🔍 Troubleshooting tips:")
-        print("   1. Verify the database server is running")
-        print("   2. Check if the host and port are correct")
-        print("   3. Verify username and password are correct")
-        print("   4. Ensure the database name exists")
-        print("   5. Check firewall settings")
+        print(_TROUBLESHOOTING_TIPS)
         return False
         
     except Exception as e:
@@ -110,7 +115,7 @@ def test_database_connection():
 def main():
     """Main function."""
     print("🚀 PostgreSQL Connection Test Utility")
-    print("=" * 50)
+    print(_BANNER)
     
     success = test_database_connection()
     